@@ -4,4 +4,5 @@ from django.utils.translation import gettext_lazy as _
 
 class FormToolsConfig(AppConfig):
     name = 'formtools'
+    default_auto_field = 'django.db.models.AutoField'
     verbose_name = _("Form Tools")
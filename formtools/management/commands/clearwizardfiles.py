@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from formtools.models import WizardFile
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the expired temporary files of wizard storages tracking "
+        "their files (see BaseStorage.track_files)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=settings.SESSION_COOKIE_AGE,
+            help='Age in seconds after which a file expires. Defaults to SESSION_COOKIE_AGE.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of files deleted per batch.',
+        )
+
+    def handle(self, *args, **options):
+        expired = WizardFile.objects.filter(
+            created__lt=timezone.now() - timedelta(seconds=options['max_age']),
+        ).order_by('pk')
+        storages = {}
+        deleted = 0
+        while batch := list(expired[:options['batch_size']]):
+            for wizard_file in batch:
+                if wizard_file.storage not in storages:
+                    storages[wizard_file.storage] = wizard_file.get_storage()
+                storages[wizard_file.storage].delete(wizard_file.name)
+            WizardFile.objects.filter(pk__in=[wizard_file.pk for wizard_file in batch]).delete()
+            deleted += len(batch)
+        if options['verbosity'] >= 1:
+            self.stdout.write('Deleted %d expired wizard file(s).' % deleted)
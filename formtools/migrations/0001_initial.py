@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WizardFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage', models.TextField(verbose_name='storage')),
+                ('name', models.TextField(verbose_name='name')),
+                ('created', models.DateTimeField(
+                    db_index=True, default=django.utils.timezone.now, verbose_name='created')),
+            ],
+            options={
+                'verbose_name': 'wizard file',
+                'verbose_name_plural': 'wizard files',
+            },
+        ),
+    ]
@@ -1,2 +1,38 @@
-# This file is required to pretend formtools has models.
-# Otherwise test models cannot be registered.
+import json
+
+from django.db import models
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+from .utils import get_storage_key
+
+
+class WizardFileQuerySet(models.QuerySet):
+    def for_storage(self, file_storage):
+        return self.filter(storage=get_storage_key(file_storage))
+
+
+class WizardFile(models.Model):
+    """
+    A temporary file saved by a wizard storage which tracks its files (see
+    ``BaseStorage.track_files``), deleted by the ``clearwizardfiles``
+    management command once it expired.
+    """
+    storage = models.TextField(_('storage'))
+    name = models.TextField(_('name'))
+    created = models.DateTimeField(_('created'), default=timezone.now, db_index=True)
+
+    objects = WizardFileQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('wizard file')
+        verbose_name_plural = _('wizard files')
+
+    def __str__(self):
+        return self.name
+
+    def get_storage(self):
+        "Returns the file storage the file was saved in."
+        path, args, kwargs = json.loads(self.storage)
+        return import_string(path)(*args, **kwargs)
@@ -1,11 +1,15 @@
 """
 Formtools Preview application.
 """
+import inspect
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
 from django.http import Http404
 from django.shortcuts import render
+from django.template.response import TemplateResponse
 from django.utils.crypto import constant_time_compare
 
-from .utils import form_hmac
+from .utils import form_hmac, get_hash_version
 
 AUTO_ID = 'formtools_%s'  # Each form here uses this as its auto_id parameter.
 
@@ -13,18 +17,25 @@ AUTO_ID = 'formtools_%s'  # Each form here uses this as its auto_id parameter.
 class FormPreview:
     preview_template = 'formtools/preview.html'
     form_template = 'formtools/form.html'
+    # Version of the security hash, see formtools.utils.form_hmac(). Hashes of
+    # all versions are accepted, so that it can be changed without rejecting
+    # the forms being previewed.
+    security_hash_version = 1
 
     # METHODS SUBCLASSES SHOULDN'T OVERRIDE ###################################
 
     def __init__(self, form):
         # form should be a Form class, not an instance.
         self.form, self.state = form, {}
+        # Names of the hidden fields, which can't clash with the form fields.
+        self.stage_field = self.unused_name('stage')
+        self.hash_field = self.unused_name('hash')
 
     def __call__(self, request, *args, **kwargs):
         stage = {
             '1': 'preview',
             '2': 'post',
-        }.get(request.POST.get(self.unused_name('stage')), 'preview')
+        }.get(request.POST.get(self.stage_field), 'preview')
         self.parse_params(request, *args, **kwargs)
         try:
             method = getattr(self, stage + '_' + request.method.lower())
@@ -65,16 +76,32 @@ class FormPreview:
         context = self.get_context(request, f)
         if f.is_valid():
             self.process_preview(request, f, context)
-            context['hash_field'] = self.unused_name('hash')
+            context['hash_field'] = self.hash_field
             context['hash_value'] = self.security_hash(request, f)
             return render(request, self.preview_template, context)
         else:
             return render(request, self.form_template, context)
 
     def _check_security_hash(self, token, request, form):
-        expected = self.security_hash(request, form)
+        version = get_hash_version(token)
+        if version is None:
+            return False
+        if version == self.security_hash_version:
+            expected = self.security_hash(request, form)
+        elif self._security_hash_accepts_version():
+            expected = self.security_hash(request, form, version=version)
+        else:
+            # An override not supporting versions only checks its own hashes.
+            return False
         return constant_time_compare(token, expected)
 
+    def _security_hash_accepts_version(self):
+        parameters = inspect.signature(self.security_hash).parameters.values()
+        return any(
+            parameter.name == 'version' or parameter.kind == parameter.VAR_KEYWORD
+            for parameter in parameters
+        )
+
     def post_post(self, request):
         """
         Validates the POST data. If valid, calls done(). Else, redisplays form.
@@ -82,7 +109,7 @@ class FormPreview:
         form = self.form(request.POST, auto_id=self.get_auto_id())
         if form.is_valid():
             if not self._check_security_hash(
-                    request.POST.get(self.unused_name('hash'), ''),
+                    request.POST.get(self.hash_field, ''),
                     request, form):
                 return self.failed_hash(request)  # Security hash failed.
             return self.done(request, form.cleaned_data)
@@ -109,7 +136,7 @@ class FormPreview:
         "Context for template rendering."
         return {
             'form': form,
-            'stage_field': self.unused_name('stage'),
+            'stage_field': self.stage_field,
             'state': self.state,
         }
 
@@ -140,7 +167,7 @@ class FormPreview:
         """
         pass
 
-    def security_hash(self, request, form):
+    def security_hash(self, request, form, version=None):
         """
         Calculates the security hash for the given
         :class:`~django.http.HttpRequest` and :class:`~django.forms.Form`
@@ -148,8 +175,15 @@ class FormPreview:
 
         Subclasses may want to take into account request-specific information,
         such as the IP address.
+
+        ``version`` selects the hash scheme (see
+        :func:`~formtools.utils.form_hmac`) and defaults to
+        :attr:`security_hash_version`. It's only passed when checking a hash
+        of another version.
         """
-        return form_hmac(form)
+        if version is None:
+            version = self.security_hash_version
+        return form_hmac(form, version=version)
 
     def failed_hash(self, request):
         """
@@ -168,3 +202,95 @@ class FormPreview:
         """
         raise NotImplementedError('You must define a done() method on your '
                                   '%s subclass.' % self.__class__.__name__)
+
+
+class AsyncFormPreview(FormPreview):
+    """
+    A FormPreview handling requests asynchronously. The ``parse_params()``,
+    ``process_preview()``, ``failed_hash()`` and ``done()`` hooks are
+    coroutine functions, and the pages are returned as ``TemplateResponse``
+    objects rendered by Django after the view returns.
+    """
+
+    # METHODS SUBCLASSES SHOULDN'T OVERRIDE ###################################
+
+    def __init__(self, form):
+        super().__init__(form)
+        # Make Django call the instance as an asynchronous view.
+        markcoroutinefunction(self)
+
+    async def __call__(self, request, *args, **kwargs):
+        stage = {
+            '1': 'preview',
+            '2': 'post',
+        }.get(request.POST.get(self.stage_field), 'preview')
+        await self.parse_params(request, *args, **kwargs)
+        try:
+            method = getattr(self, stage + '_' + request.method.lower())
+        except AttributeError:
+            raise Http404
+        return await method(request)
+
+    async def preview_get(self, request):
+        "Displays the form"
+        f = self.form(auto_id=self.get_auto_id(),
+                      initial=self.get_initial(request))
+        return TemplateResponse(request, self.form_template, self.get_context(request, f))
+
+    async def preview_post(self, request):
+        """
+        Validates the POST data. If valid, displays the preview page.
+        Else, redisplays form.
+        """
+        f = self.form(data=request.POST, files=request.FILES, auto_id=self.get_auto_id())
+        context = self.get_context(request, f)
+        if await self.avalidate_form(f):
+            await self.process_preview(request, f, context)
+            context['hash_field'] = self.hash_field
+            context['hash_value'] = await sync_to_async(self.security_hash)(request, f)
+            return TemplateResponse(request, self.preview_template, context)
+        else:
+            return TemplateResponse(request, self.form_template, context)
+
+    async def post_post(self, request):
+        """
+        Validates the POST data. If valid, calls done(). Else, redisplays form.
+        """
+        form = self.form(request.POST, auto_id=self.get_auto_id())
+        if await self.avalidate_form(form):
+            if not await sync_to_async(self._check_security_hash)(
+                    request.POST.get(self.hash_field, ''),
+                    request, form):
+                return await self.failed_hash(request)  # Security hash failed.
+            return await self.done(request, form.cleaned_data)
+        else:
+            return TemplateResponse(request, self.form_template, self.get_context(request, form))
+
+    # METHODS SUBCLASSES MIGHT OVERRIDE IF APPROPRIATE ########################
+
+    async def avalidate_form(self, form):
+        """
+        Returns whether ``form`` is valid. Validating a form may access the
+        database, so it's done in a thread. The security hash is calculated
+        in a thread for the same reason.
+        """
+        return await sync_to_async(form.is_valid)()
+
+    async def parse_params(self, request, *args, **kwargs):
+        "Asynchronous version of :meth:`FormPreview.parse_params`."
+        pass
+
+    async def process_preview(self, request, form, context):
+        "Asynchronous version of :meth:`FormPreview.process_preview`."
+        pass
+
+    async def failed_hash(self, request):
+        "Asynchronous version of :meth:`FormPreview.failed_hash`."
+        return await self.preview_post(request)
+
+    # METHODS SUBCLASSES MUST OVERRIDE ########################################
+
+    async def done(self, request, cleaned_data):
+        "Asynchronous version of :meth:`FormPreview.done`."
+        raise NotImplementedError('You must define a done() method on your '
+                                  '%s subclass.' % self.__class__.__name__)
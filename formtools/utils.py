@@ -1,27 +1,181 @@
+import datetime
+import json
 import pickle
 
-from django.core.files.uploadedfile import TemporaryUploadedFile
+from django import forms
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.db import models
 from django.utils.crypto import salted_hmac
+from django.utils.encoding import force_bytes
 
 
-def form_hmac(form):
+def _pickle_chunks(values):
+    # The original hash: the list of the values is pickled at once, reading
+    # temporary files into memory.
+    data = [
+        (name, value.read() if isinstance(value, TemporaryUploadedFile) else value)
+        for name, value in values
+    ]
+    yield pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+# Size of the blocks of encoded values passed to the HMAC by version 2.
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def _canonical_chunks(values):
+    # The values are encoded into a buffer, updating the HMAC in large blocks.
+    # Only the chunks of uploaded files are yielded separately.
+    buffer = bytearray()
+    for name, value in values:
+        if type(value) is str and value.isascii() and name.isascii():
+            # The length of an ASCII string is the length of its encoding.
+            buffer += ('k%d:%ss%d:%s' % (len(name), name, len(value), value)).encode()
+        else:
+            key = name.encode()
+            buffer += b'k%d:%s' % (len(key), key)
+            if isinstance(value, (UploadedFile, list, tuple, models.QuerySet)):
+                yield from _encode_value(value, buffer)
+            else:
+                buffer += _encode_scalar(value)
+        if len(buffer) >= HASH_BLOCK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    yield bytes(buffer)
+
+
+def _encode_value(value, buffer):
+    if isinstance(value, UploadedFile):
+        buffer += b'f%d:' % value.size
+        yield bytes(buffer)
+        buffer.clear()
+        for chunk in value.chunks():
+            yield force_bytes(chunk)
+    else:
+        items = list(value)
+        buffer += b'l%d:' % len(items)
+        for item in items:
+            if isinstance(item, (UploadedFile, list, tuple, models.QuerySet)):
+                yield from _encode_value(item, buffer)
+            else:
+                buffer += _encode_scalar(item)
+
+
+def _encode_scalar(value):
+    if isinstance(value, str):
+        if value.isascii():
+            return ('s%d:%s' % (len(value), value)).encode()
+        data = value.encode()
+        return b's%d:%s' % (len(data), data)
+    if value is None:
+        return b'n0:'
+    if isinstance(value, bool):
+        return b'b1:1' if value else b'b1:0'
+    if isinstance(value, (datetime.date, datetime.time)):
+        tag, text = b'd', value.isoformat()
+    elif isinstance(value, models.Model):
+        tag, text = b'm', '%s:%s' % (value._meta.label, value.pk)
+    elif isinstance(value, dict):
+        tag, text = b'j', json.dumps(value, sort_keys=True, default=str)
+    else:
+        # Numbers, UUIDs, ...
+        tag, text = b'o', str(value)
+    data = text.encode()
+    return b'%s%d:%s' % (tag, len(data), data)
+
+
+# Key salt and encoding of the versions of the security hash calculated by
+# form_hmac(). Hashes of versions other than 1 are prefixed with "<version>$".
+HASH_VERSIONS = {
+    1: ('django.contrib.formtools', _pickle_chunks),
+    2: ('formtools.utils.form_hmac.2', _canonical_chunks),
+}
+
+
+def get_hash_version(token):
+    """
+    Returns the version of the security hash `token`, or None if it isn't a
+    known version.
+    """
+    prefix, sep, _ = token.partition('$')
+    if not sep:
+        return 1
+    if prefix.isdecimal() and int(prefix) in HASH_VERSIONS and int(prefix) != 1:
+        return int(prefix)
+    return None
+
+
+def _get_cleaned_values(form, reuse_models=True):
+    """
+    Returns the values of `form.cleaned_data` which are known to be equal to
+    the result of cleaning the field data again, if the form was validated.
+    Model instances and querysets are left out unless `reuse_models` is true.
+    """
+    if not (form.is_bound and hasattr(form, 'cleaned_data')) or form.errors:
+        return {}
+    if type(form).clean not in (forms.BaseForm.clean, forms.BaseModelForm.clean):
+        # A custom clean() may have changed any of the values.
+        return {}
+    return {
+        name: value for name, value in form.cleaned_data.items()
+        if name in form.fields and
+        # Disabled fields clean their initial value, file fields consider it
+        # too and clean_<name>() methods may change the value.
+        not form.fields[name].disabled and
+        not isinstance(form.fields[name], forms.FileField) and
+        not hasattr(form, 'clean_%s' % name) and
+        (reuse_models or not isinstance(value, (models.Model, models.QuerySet)))
+    }
+
+
+def form_hmac(form, version=1):
     """
     Calculates a security hash for the given Form instance.
+
+    The cleaned data of validated forms is reused. Version 1 hashes the
+    pickled values, version 2 uses a canonical length-prefixed encoding which
+    doesn't depend on the pickle protocol. Version 2 is updated in blocks and
+    reads uploaded files in chunks, so that they never need to fit into
+    memory. As it's encoded in Python, it's slower than pickling for forms
+    with many fields, but faster for uploaded files.
     """
-    data = []
+    try:
+        key_salt, encode = HASH_VERSIONS[version]
+    except KeyError:
+        raise ValueError('Unknown security hash version: %r' % version)
+    hmac = salted_hmac(key_salt, b'')
+    # Pickling model instances and querysets includes their caches (e.g. of
+    # related objects), which may have been filled since the form was cleaned.
+    for chunk in encode(_iter_values(form, reuse_models=version != 1)):
+        hmac.update(chunk)
+    if version == 1:
+        return hmac.hexdigest()
+    return '%d$%s' % (version, hmac.hexdigest())
+
+
+def _iter_values(form, reuse_models):
+    "Yields the names and values of the fields hashed by form_hmac()."
+    # Don't clean the fields of validated forms again, cleaning can be
+    # expensive (e.g. querying the database).
+    cleaned_values = _get_cleaned_values(form, reuse_models)
     for bf in form:
         # Get the value from the form data. If the form allows empty or hasn't
         # changed then don't call clean() to avoid trigger validation errors.
-        if form.empty_permitted and not form.has_changed():  # noqa: SIM108
+        if form.empty_permitted and not form.has_changed():
             value = bf.data or ''
+        elif bf.name in cleaned_values:
+            value = cleaned_values[bf.name] or ''
         else:
             value = bf.field.clean(bf.data) or ''
         if isinstance(value, str):
             value = value.strip()
-        elif isinstance(value, TemporaryUploadedFile):
-            value = value.read()
-        data.append((bf.name, value))
+        yield bf.name, value
 
-    pickled = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
-    key_salt = 'django.contrib.formtools'
-    return salted_hmac(key_salt, pickled).hexdigest()
+
+def get_storage_key(file_storage):
+    """
+    Returns a string identifying `file_storage`, from which the storage can be
+    reconstructed. The storage needs to be deconstructible.
+    """
+    path, args, kwargs = file_storage.deconstruct()
+    return json.dumps([path, args, kwargs], sort_keys=True, default=str)
@@ -1,3 +1,5 @@
+from functools import cache
+
 from django.utils.module_loading import import_string
 
 from .base import BaseStorage
@@ -5,12 +7,23 @@ from .exceptions import MissingStorage, NoFileStorageConfigured
 
 __all__ = [
     "BaseStorage", "MissingStorage", "NoFileStorageConfigured", "get_storage",
+    "get_storage_class",
 ]
 
 
-def get_storage(path, *args, **kwargs):
+@cache
+def get_storage_class(path):
+    """
+    Returns the storage class for the given dotted `path`. Resolved classes
+    are cached, use ``get_storage_class.cache_clear()`` to reset the cache.
+    """
     try:
-        storage_class = import_string(path)
+        return import_string(path)
     except ImportError as e:
         raise MissingStorage('Error loading storage: %s' % e)
+
+
+def get_storage(path, *args, **kwargs):
+    # Storage classes can be passed directly instead of their dotted path.
+    storage_class = get_storage_class(path) if isinstance(path, str) else path
     return storage_class(*args, **kwargs)
@@ -1,21 +1,121 @@
+import os
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
 from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+from django.utils.crypto import (
+    constant_time_compare, get_random_string, salted_hmac,
+)
 from django.utils.datastructures import MultiValueDict
 
+from ...utils import get_storage_key
 from .exceptions import NoFileStorageConfigured
 
 
+class LazyUploadedFile(UploadedFile):
+    """
+    An uploaded file stored in a file storage, which is only opened when its
+    content is first accessed.
+    """
+
+    def __init__(self, file_storage, tmp_name, **kwargs):
+        super().__init__(**kwargs)
+        self.file_storage = file_storage
+        self.tmp_name = tmp_name
+
+    def _get_file(self):
+        if self._file is None:
+            self._file = self.file_storage.open(self.tmp_name)
+        return self._file
+
+    def _set_file(self, file):
+        self._file = file
+
+    file = property(_get_file, _set_file)
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    def open(self, mode=None):
+        if self.closed:
+            self._file = self.file_storage.open(self.tmp_name, mode or 'rb')
+        else:
+            self.seek(0)
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
 class BaseStorage:
     step_key = 'step'
     step_data_key = 'step_data'
     step_files_key = 'step_files'
     extra_data_key = 'extra_data'
+    validation_digests_key = 'validation_digests'
+    condition_results_key = 'condition_results'
+    files_salt_key = 'files_salt'
+    # Serializer class (see formtools.wizard.storage.serializers) used by
+    # backends serializing the data themselves. None leaves the serialization
+    # to the underlying store (e.g. the cache).
+    serializer_class = None
+    # Name the temporary files after a digest of their content, so that an
+    # unchanged file submitted again isn't saved again.
+    deduplicate_files = True
+    # Record the temporary files in the database (see the WizardFile model),
+    # so that the files of abandoned wizards can be deleted with the
+    # clearwizardfiles management command.
+    track_files = False
 
-    def __init__(self, prefix, request=None, file_storage=None):
+    def __init__(self, prefix, request=None, file_storage=None, serializer=None):
         self.prefix = 'wizard_%s' % prefix
         self.request = request
         self.file_storage = file_storage
+        serializer = serializer or self.serializer_class
+        self.serializer = serializer() if serializer is not None else None
         self._files = {}
         self._tmp_files = []
+        self._data = None
+
+    def _get_data(self):
+        if self._data is None:
+            data = self.load_data()
+            if data is None:
+                self.init_data()
+            else:
+                self._data = data
+        return self._data
+
+    def _set_data(self, value):
+        self._data = value
+
+    data = property(_get_data, _set_data)
+
+    def load_data(self):
+        """
+        Returns the stored wizard data or None if there isn't any. It's loaded
+        on first access of ``data``.
+        """
+        return None
+
+    async def aload_data(self):
+        "Asynchronous version of load_data()."
+        return self.load_data()
+
+    async def aload(self):
+        """
+        Loads the wizard data without blocking the event loop. The async
+        wizard views call it before accessing the data.
+        """
+        if self._data is None:
+            data = await self.aload_data()
+            if data is None:
+                self.init_data()
+            else:
+                self._data = data
 
     def init_data(self):
         self.data = {
@@ -35,11 +135,33 @@ class BaseStorage:
                 self._tmp_files.append(step_file['tmp_name'])
         self.init_data()
 
+    def serialize(self, data):
+        "Returns `data` serialized with the serializer (if any)."
+        if self.serializer is None:
+            return data
+        return self.serializer.dumps(data)
+
+    def deserialize(self, data):
+        "Returns the `data` loaded with the serializer (if any)."
+        if self.serializer is None or data is None:
+            return data
+        return self.serializer.loads(data)
+
+    def mark_modified(self):
+        """
+        Gets called whenever the wizard data is changed. Backends can use it
+        to save the data only if needed. Call it yourself after mutating the
+        ``extra_data`` dictionary in place.
+        """
+        pass
+
     def _get_current_step(self):
         return self.data[self.step_key]
 
     def _set_current_step(self, step):
-        self.data[self.step_key] = step
+        if self.data[self.step_key] != step:
+            self.data[self.step_key] = step
+            self.mark_modified()
 
     @property
     def current_step(self):
@@ -54,6 +176,7 @@ class BaseStorage:
 
     def _set_extra_data(self, extra_data):
         self.data[self.extra_data_key] = extra_data
+        self.mark_modified()
 
     @property
     def extra_data(self):
@@ -78,7 +201,35 @@ class BaseStorage:
         # can be truncated (__getitem__ returns only the first item).
         if isinstance(cleaned_data, MultiValueDict):
             cleaned_data = dict(cleaned_data.lists())
-        self.data[self.step_data_key][step] = cleaned_data
+        if self.data[self.step_data_key].get(step) != cleaned_data:
+            self.data[self.step_data_key][step] = cleaned_data
+            self.mark_modified()
+
+    def get_validation_digest(self, step):
+        "Returns the digest stored for `step` when it was validated, if any."
+        return self.data.get(self.validation_digests_key, {}).get(step)
+
+    def set_validation_digest(self, step, digest):
+        digests = self.data.setdefault(self.validation_digests_key, {})
+        if digests.get(step) != digest:
+            digests[step] = digest
+            self.mark_modified()
+
+    def get_condition_result(self, step, digest):
+        """
+        Returns the result stored for the condition of `step` if it was
+        evaluated with the dependency data matching `digest`, None otherwise.
+        """
+        stored = self.data.get(self.condition_results_key, {}).get(step)
+        if stored is None or not constant_time_compare(stored[0], digest):
+            return None
+        return stored[1]
+
+    def set_condition_result(self, step, digest, result):
+        results = self.data.setdefault(self.condition_results_key, {})
+        if results.get(step) != [digest, result]:
+            results[step] = [digest, result]
+            self.mark_modified()
 
     @property
     def current_step_data(self):
@@ -97,30 +248,134 @@ class BaseStorage:
             field_dict = field_dict.copy()
             tmp_name = field_dict.pop('tmp_name')
             if (step, field) not in self._files:
-                self._files[(step, field)] = UploadedFile(
-                    file=self.file_storage.open(tmp_name), **field_dict)
+                # The file is only opened when it's read.
+                self._files[(step, field)] = LazyUploadedFile(
+                    self.file_storage, tmp_name, **field_dict)
             files[field] = self._files[(step, field)]
         return files or None
 
+    async def aget_step_files(self, step):
+        """
+        Asynchronous version of get_step_files(). The files are opened when
+        they're read, e.g. by a form validated in a thread.
+        """
+        return self.get_step_files(step)
+
     def set_step_files(self, step, files):
         if files and not self.file_storage:
             raise NoFileStorageConfigured(
                 "You need to define 'file_storage' in your "
                 "wizard view in order to handle file uploads.")
 
+        key_salt = self._get_files_key_salt(step) if files else None
+        tmp_names, new_names, reused_names = {}, [], []
+        for field, field_file in (files or {}).items():
+            tmp_names[field], saved = self._save_step_file(key_salt, field_file)
+            (new_names if saved else reused_names).append(tmp_names[field])
+        self.register_files(new_names)
+        self.refresh_files(reused_names)
+        self._store_step_files(step, files, tmp_names)
+
+    async def aset_step_files(self, step, files):
+        "Asynchronous version of set_step_files(), saving the files in a thread."
+        if files and not self.file_storage:
+            raise NoFileStorageConfigured(
+                "You need to define 'file_storage' in your "
+                "wizard view in order to handle file uploads.")
+
+        key_salt = self._get_files_key_salt(step) if files else None
+        tmp_names, new_names, reused_names = {}, [], []
+        for field, field_file in (files or {}).items():
+            tmp_names[field], saved = await sync_to_async(
+                self._save_step_file, thread_sensitive=False)(key_salt, field_file)
+            (new_names if saved else reused_names).append(tmp_names[field])
+        if self.track_files and new_names:
+            await sync_to_async(self.register_files)(new_names)
+        if self.track_files and reused_names:
+            await sync_to_async(self.refresh_files)(reused_names)
+        self._store_step_files(step, files, tmp_names)
+
+    def _get_files_key_salt(self, step):
+        if not self.deduplicate_files:
+            return None
+        # The random salt limits the deduplication to the files of a step of
+        # this wizard run. Different users never share a temporary file, and
+        # resetting the wizard can delete its files.
+        if self.files_salt_key not in self.data:
+            self.data[self.files_salt_key] = get_random_string(16)
+            self.mark_modified()
+        return 'formtools.wizard.storage.%s.%s' % (self.data[self.files_salt_key], step)
+
+    def _save_step_file(self, key_salt, field_file):
+        """
+        Saves `field_file` in the file storage and returns its name and
+        whether it was saved. If `key_salt` is given, the name is a digest of
+        the content and an existing file with that name is reused.
+        """
+        if key_salt is None:
+            return self.file_storage.save(field_file.name, field_file), True
+        hmac = salted_hmac(key_salt, b'', algorithm='sha256')
+        for chunk in field_file.chunks():
+            hmac.update(chunk)
+        name = self.file_storage.generate_filename(
+            hmac.hexdigest() + os.path.splitext(field_file.name)[1])
+        if self.file_storage.exists(name):
+            return name, False
+        return self.file_storage.save(name, field_file), True
+
+    def register_files(self, names):
+        """
+        Records the temporary files `names` as created now, if the storage
+        tracks its files.
+        """
+        if self.track_files and names:
+            wizard_file = apps.get_model('formtools', 'WizardFile')
+            storage_key = get_storage_key(self.file_storage)
+            wizard_file.objects.bulk_create([
+                wizard_file(storage=storage_key, name=name) for name in names
+            ])
+
+    def refresh_files(self, names):
+        """
+        Records the reused temporary files `names` as created now, so that
+        they don't expire while they're still in use.
+        """
+        if self.track_files and names:
+            wizard_file = apps.get_model('formtools', 'WizardFile')
+            wizard_file.objects.for_storage(self.file_storage).filter(name__in=names).update(
+                created=timezone.now())
+
+    def unregister_files(self, names):
+        "Forgets about the deleted temporary files `names`."
+        if self.track_files and names:
+            wizard_file = apps.get_model('formtools', 'WizardFile')
+            wizard_file.objects.for_storage(self.file_storage).filter(name__in=names).delete()
+
+    def _store_step_files(self, step, files, tmp_names):
         if step not in self.data[self.step_files_key]:
             self.data[self.step_files_key][step] = {}
+            self.mark_modified()
 
+        step_files = self.data[self.step_files_key][step]
+        replaced = set()
         for field, field_file in (files or {}).items():
-            tmp_filename = self.file_storage.save(field_file.name, field_file)
+            if field in step_files:
+                replaced.add(step_files[field]['tmp_name'])
             file_dict = {
-                'tmp_name': tmp_filename,
+                'tmp_name': tmp_names[field],
                 'name': field_file.name,
                 'content_type': field_file.content_type,
                 'size': field_file.size,
                 'charset': field_file.charset
             }
-            self.data[self.step_files_key][step][field] = file_dict
+            if step_files.get(field) != file_dict:
+                step_files[field] = file_dict
+                self.mark_modified()
+
+        # Delete the superseded files at the end of the response cycle, unless
+        # they're still used (the names of deduplicated files can repeat).
+        replaced.difference_update(file_dict['tmp_name'] for file_dict in step_files.values())
+        self._tmp_files.extend(sorted(replaced))
 
     @property
     def current_step_files(self):
@@ -133,8 +388,24 @@ class BaseStorage:
                     file.close()
             for tmp_file in self._tmp_files:
                 self.file_storage.delete(tmp_file)
+            self.unregister_files(self._tmp_files)
 
         if hasattr(response, 'render'):
             response.add_post_render_callback(post_render_callback)
         else:
             post_render_callback(response)
+
+    async def asave(self, response):
+        """
+        Asynchronous version of update_response(), called by the async wizard
+        views. Unless the response is rendered later, the temporary files are
+        deleted in a thread.
+        """
+        tmp_files = []
+        if not hasattr(response, 'render'):
+            tmp_files, self._tmp_files = self._tmp_files, []
+        self.update_response(response)
+        for tmp_file in tmp_files:
+            await sync_to_async(self.file_storage.delete, thread_sensitive=False)(tmp_file)
+        if self.track_files and tmp_files:
+            await sync_to_async(self.unregister_files)(tmp_files)
@@ -0,0 +1,212 @@
+import time
+
+from django.core.cache import caches
+from django.utils.crypto import get_random_string
+
+from .base import BaseStorage
+
+
+class CacheStorage(BaseStorage):
+    """
+    Keeps the wizard data in a Django cache. The browser only gets a signed
+    cookie containing the random token the cache keys are built from.
+
+    The data and files of every step are stored under their own cache key,
+    fetched on first access and only written back if they were changed, so
+    a request only reads and writes the steps it touches. The expiry of the
+    unchanged keys is refreshed when data is written and half of the timeout
+    has passed since their last refresh.
+    """
+    steps_key = 'steps'
+    refreshed_key = 'refreshed'
+    # Alias of the cache (see the CACHES setting) used to store the data.
+    cache_alias = 'default'
+    # Number of seconds the data is kept after the last change (at least half
+    # of it for the unchanged steps), None keeps it until the cache evicts it.
+    timeout = 60 * 60 * 24
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = caches[self.cache_alias]
+        self.modified = False
+        self._loaded_steps = set()
+        self._dirty_steps = set()
+        self._deleted_keys = set()
+        self.token = self.request.get_signed_cookie(self.prefix, default=None)
+        self.new_token = self.token is None
+        if self.new_token:
+            self.token = get_random_string(32)
+
+    def load_data(self):
+        if self.new_token:
+            return None
+        return self._unpack_data(self.cache.get(self.get_cache_key()))
+
+    async def aload_data(self):
+        if self.new_token:
+            return None
+        return self._unpack_data(await self.cache.aget(self.get_cache_key()))
+
+    async def aload(self):
+        # Steps can't be loaded lazily without blocking, fetch all of them.
+        await super().aload()
+        await self.aload_steps(self.data[self.steps_key])
+
+    def _unpack_data(self, value):
+        data = self.deserialize(value)
+        if data is None:
+            return None
+        return {
+            **data,
+            self.step_data_key: {},
+            self.step_files_key: {},
+        }
+
+    def get_cache_key(self, step=None):
+        """
+        Returns the cache key of the wizard data or, if `step` is given, of
+        the data and files of `step`.
+        """
+        key = f'formtools.wizard.{self.prefix}.{self.token}'
+        if step is not None:
+            # Step names aren't necessarily valid cache keys, use their index.
+            key = '%s.%d' % (key, self.data[self.steps_key].index(step))
+        return key
+
+    def init_data(self):
+        super().init_data()
+        self.data[self.steps_key] = []
+        self.data[self.refreshed_key] = time.time()
+        self.mark_modified()
+
+    def mark_modified(self):
+        self.modified = True
+
+    def load_steps(self, steps):
+        """
+        Fetches the data and files of the given `steps` from the cache, unless
+        they were already loaded.
+        """
+        keys = self._get_step_keys(steps)
+        if keys:
+            self._store_steps(keys, self.cache.get_many(keys))
+
+    async def aload_steps(self, steps):
+        "Asynchronous version of load_steps()."
+        keys = self._get_step_keys(steps)
+        if keys:
+            self._store_steps(keys, await self.cache.aget_many(keys))
+
+    def _get_step_keys(self, steps):
+        keys = {}
+        for step in steps:
+            if step not in self._loaded_steps:
+                self._loaded_steps.add(step)
+                if step in self.data[self.steps_key]:
+                    keys[self.get_cache_key(step)] = step
+        return keys
+
+    def _store_steps(self, keys, values):
+        for key, value in values.items():
+            step_data, step_files = self.deserialize(value)
+            if step_data is not None:
+                self.data[self.step_data_key][keys[key]] = step_data
+            if step_files is not None:
+                self.data[self.step_files_key][keys[key]] = step_files
+
+    def _set_step(self, step, method, *args):
+        self.load_steps([step])
+        modified, self.modified = self.modified, False
+        method(step, *args)
+        if self.modified:
+            self._dirty_steps.add(step)
+            if step not in self.data[self.steps_key]:
+                self.data[self.steps_key].append(step)
+                modified = True
+        self.modified = modified
+
+    def reset(self):
+        # Load all steps to find their temporary files and clear their keys.
+        self.load_steps(self.data[self.steps_key])
+        self._deleted_keys.update(self.get_cache_key(step) for step in self.data[self.steps_key])
+        self._loaded_steps.clear()
+        self._dirty_steps.clear()
+        super().reset()
+
+    def get_step_data(self, step):
+        self.load_steps([step])
+        return super().get_step_data(step)
+
+    def set_step_data(self, step, cleaned_data):
+        self._set_step(step, super().set_step_data, cleaned_data)
+
+    def get_step_files(self, step):
+        self.load_steps([step])
+        return super().get_step_files(step)
+
+    def _store_step_files(self, step, files, tmp_names):
+        self._set_step(step, super()._store_step_files, files, tmp_names)
+
+    def update_response(self, response):
+        super().update_response(response)
+        updates, touched_keys, deleted_keys = self._pop_changes()
+        if deleted_keys:
+            self.cache.delete_many(deleted_keys)
+        if updates:
+            self.cache.set_many(updates, self.timeout)
+        for key in touched_keys:
+            self.cache.touch(key, self.timeout)
+        if self.new_token:
+            response.set_signed_cookie(self.prefix, self.token)
+            self.new_token = False
+
+    async def asave(self, response):
+        updates, touched_keys, deleted_keys = self._pop_changes()
+        if deleted_keys:
+            await self.cache.adelete_many(deleted_keys)
+        if updates:
+            await self.cache.aset_many(updates, self.timeout)
+        for key in touched_keys:
+            await self.cache.atouch(key, self.timeout)
+        await super().asave(response)
+
+    def _pop_changes(self):
+        """
+        Returns the values to write to the cache by key, the keys whose
+        timeout is refreshed and the keys to delete, and forgets about them.
+        """
+        # Keep the unchanged keys as long as the changed ones, so that the
+        # data of the wizard expires as a whole. Touching them on every write
+        # would cost a round trip per step, they're only refreshed once half
+        # of the timeout has passed.
+        now = time.time()
+        refresh = (
+            bool(self.modified or self._dirty_steps) and self.timeout is not None and
+            now - self.data.get(self.refreshed_key, 0) >= self.timeout / 2
+        )
+        if refresh:
+            self.data[self.refreshed_key] = now
+            self.modified = True
+        updates = {
+            self.get_cache_key(step): self.serialize((
+                self.data[self.step_data_key].get(step),
+                self.data[self.step_files_key].get(step),
+            ))
+            for step in self._dirty_steps
+        }
+        if self.modified:
+            updates[self.get_cache_key()] = self.serialize({
+                key: value for key, value in self.data.items()
+                if key not in (self.step_data_key, self.step_files_key)
+            })
+        deleted_keys = self._deleted_keys.difference(updates)
+        touched_keys = []
+        if refresh:
+            touched_keys = [
+                key for key in map(self.get_cache_key, self.data[self.steps_key])
+                if key not in updates
+            ]
+        self.modified = False
+        self._dirty_steps.clear()
+        self._deleted_keys.clear()
+        return updates, touched_keys, deleted_keys
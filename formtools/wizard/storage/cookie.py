@@ -1,27 +1,125 @@
-import json
+import warnings
+import zlib
+
+from django.core import signing
+from django.http.cookie import SimpleCookie
 
 from .base import BaseStorage
+from .serializers import JSONSerializer
 
 
 class CookieStorage(BaseStorage):
-    encoder = json.JSONEncoder(separators=(',', ':'))
+    serializer_class = JSONSerializer
+    # Deprecated, set serializer_class instead. A JSON encoder set by a
+    # subclass is still used to serialize the data.
+    encoder = JSONSerializer.encoder
+    # Compress the data with zlib if that makes the cookie smaller.
+    compress = True
+    # Maximum size of a single cookie value. Larger data is split across
+    # several cookies named "<prefix>-1", "<prefix>-2", ... while the cookie
+    # named "<prefix>" only holds the number of chunks.
+    max_cookie_size = 3800
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data = self.load_data()
-        if self.data is None:
-            self.init_data()
+        self._loaded_data = None
+        if self.encoder is not CookieStorage.encoder:
+            warnings.warn(
+                'CookieStorage.encoder is deprecated, set serializer_class to a '
+                'serializer class instead.', DeprecationWarning, stacklevel=2)
+            if type(self.serializer) is JSONSerializer:
+                self.serializer = JSONSerializer()
+                self.serializer.encoder = self.encoder
+
+    def get_chunk_names(self, count):
+        return ['%s-%d' % (self.prefix, i) for i in range(1, count + 1)]
+
+    def get_chunk_signer(self):
+        return signing.get_cookie_signer(salt='%s-chunks' % self.prefix)
+
+    def encode_data(self, data, compress=None):
+        """
+        Returns the cookie value for the serialized `data`. It's compressed if
+        `compress` is true or, if `compress` is None, if the ``compress``
+        attribute is set and compressing saves space. The output of binary
+        serializers is always compressed.
+        """
+        if self.serializer.binary:
+            compress = True
+        elif compress is None:
+            if not self.compress:
+                return data.decode()
+        elif not compress:
+            return data.decode()
+        # A leading dot marks compressed data, which is base64 encoded.
+        compressed = '.' + signing.b64_encode(zlib.compress(data)).decode()
+        if compress or len(compressed) < len(data):
+            return compressed
+        return data.decode()
+
+    def decode_data(self, value):
+        data = value.encode()
+        if data[:1] == b'.':
+            data = zlib.decompress(signing.b64_decode(data[1:]))
+        self._loaded_data = data
+        return self.deserialize(data)
 
     def load_data(self):
-        data = self.request.get_signed_cookie(self.prefix, default=None)
+        value = self.request.COOKIES.get(self.prefix)
+        if value is not None and value.isdigit():
+            # The data is split across several cookies.
+            chunks = [self.request.COOKIES.get(name) for name in self.get_chunk_names(int(value))]
+            if None in chunks:
+                return None
+            try:
+                data = self.get_chunk_signer().unsign(''.join(chunks))
+            except signing.BadSignature:
+                return None
+        else:
+            data = self.request.get_signed_cookie(self.prefix, default=None)
         if data is None:
             return None
-        return json.loads(data, cls=json.JSONDecoder)
+        return self.decode_data(data)
 
     def update_response(self, response):
         super().update_response(response)
+        old_count = self.request.COOKIES.get(self.prefix, '')
+        old_chunks = self.get_chunk_names(int(old_count)) if old_count.isdigit() else []
+        new_chunks = []
         if self.data:
-            response.set_signed_cookie(self.prefix,
-                                       self.encoder.encode(self.data))
+            data = self.serialize(self.data)
+            if data == self._loaded_data:
+                # Nothing changed, the browser already has the right cookies.
+                return
+            new_chunks = self.set_cookies(response, data)
         else:
             response.delete_cookie(self.prefix)
+        for name in old_chunks:
+            if name not in new_chunks:
+                response.delete_cookie(name)
+
+    def set_cookies(self, response, data):
+        """
+        Stores the signed serialized `data` in the cookies of `response` and returns
+        the names of the chunk cookies used, if any. Chunk cookies whose value
+        didn't change aren't sent again.
+        """
+        response.set_signed_cookie(self.prefix, self.encode_data(data))
+        signed_value = response.cookies[self.prefix].value
+        if len(SimpleCookie().value_encode(signed_value)[1]) <= self.max_cookie_size:
+            return []
+
+        # Too large for a single cookie, split the compressed data (which only
+        # contains cookie-safe characters) across several cookies.
+        signed_value = self.get_chunk_signer().sign(self.encode_data(data, compress=True))
+        size = self.max_cookie_size
+        chunks = [signed_value[i:i + size] for i in range(0, len(signed_value), size)]
+        names = self.get_chunk_names(len(chunks))
+        if self.request.COOKIES.get(self.prefix) == str(len(chunks)):
+            del response.cookies[self.prefix]
+        else:
+            response.set_cookie(self.prefix, str(len(chunks)))
+        for name, chunk in zip(names, chunks):
+            if self.request.COOKIES.get(name) != chunk:
+                response.set_cookie(name, chunk)
+        return names
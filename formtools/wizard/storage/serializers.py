@@ -0,0 +1,113 @@
+"""
+Serializers turning the wizard data into bytes and back. They are used by the
+storage backends serializing the data themselves (see ``BaseStorage``).
+"""
+import json
+from collections import Counter
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JSONSerializer:
+    """
+    Serializes the data to compact JSON.
+    """
+    binary = False
+    encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dumps(self, data):
+        return self.encoder.encode(data).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class CompactJSONSerializer(JSONSerializer):
+    """
+    Serializes the data to JSON, storing repeated dictionary keys only once.
+    Such keys are replaced by their position in a table of keys, which saves
+    space when field names are repeated (e.g. the metadata of stored files).
+    """
+
+    def dumps(self, data):
+        counts = Counter()
+
+        def count(value):
+            if isinstance(value, dict):
+                counts.update(value.keys())
+                value = value.values()
+            elif not isinstance(value, (list, tuple)):
+                return
+            for item in value:
+                count(item)
+
+        count(data)
+        keys = {}
+        for key, num in counts.items():
+            # Only intern keys if replacing them by their (quoted) position
+            # saves more than adding them to the table of keys costs.
+            size = len(str(key)) + 2
+            if (num - 1) * size > num * (len(str(len(keys))) + 2) + 1:
+                keys[key] = str(len(keys))
+
+        def intern(value):
+            if isinstance(value, dict):
+                return {self.encode_key(key, keys): intern(item) for key, item in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [intern(item) for item in value]
+            return value
+
+        return super().dumps([list(keys), intern(data)])
+
+    def encode_key(self, key, keys):
+        if key in keys:
+            return keys[key]
+        key = str(key)
+        # Escape keys which could be mistaken for a position.
+        if key.isdecimal() or key.startswith('~'):
+            return '~' + key
+        return key
+
+    def loads(self, data):
+        keys, data = super().loads(data)
+
+        def decode_key(key):
+            if key.isdecimal():
+                return keys[int(key)]
+            if key.startswith('~'):
+                return key[1:]
+            return key
+
+        def restore(value):
+            if isinstance(value, dict):
+                return {decode_key(key): restore(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [restore(item) for item in value]
+            return value
+
+        return restore(data)
+
+
+class MsgPackSerializer:
+    """
+    Serializes the data to the binary MessagePack format. Requires the
+    ``msgpack`` package.
+    """
+    binary = True
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured(
+                "You need to install the 'msgpack' package in order to use "
+                "the MsgPackSerializer.")
+
+    def dumps(self, data):
+        return msgpack.packb(data)
+
+    def loads(self, data):
+        return msgpack.unpackb(data)
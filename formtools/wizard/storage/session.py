@@ -2,18 +2,36 @@ from .base import BaseStorage
 
 
 class SessionStorage(BaseStorage):
+    # By default the session is only marked as modified when the wizard data
+    # is changed through the storage API. Set this to True to mark it as
+    # modified on every access, e.g. if your code mutates ``extra_data`` in
+    # place without calling ``mark_modified()``.
+    modified_on_access = False
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if self.prefix not in self.request.session:
-            self.init_data()
+    def mark_modified(self):
+        self.request.session.modified = True
+
+    async def aload(self):
+        # Load the session with Django's async session API, it's cached for
+        # the following synchronous accesses.
+        await self.request.session.ahas_key(self.prefix)
 
     def _get_data(self):
-        self.request.session.modified = True
-        return self.request.session[self.prefix]
+        session = self.request.session
+        if self.prefix not in session:
+            # An empty wizard doesn't need to be saved, writes to it mark the
+            # session as modified anyway.
+            modified = session.modified
+            self.init_data()
+            session.modified = modified
+        if self.modified_on_access:
+            session.modified = True
+        return session[self.prefix]
 
     def _set_data(self, value):
-        self.request.session[self.prefix] = value
-        self.request.session.modified = True
+        # Assigning to the session marks it as modified, skip it if the data
+        # didn't change (e.g. when resetting an already empty wizard).
+        if self.request.session.get(self.prefix) != value:
+            self.request.session[self.prefix] = value
 
     data = property(_get_data, _set_data)
@@ -0,0 +1,80 @@
+"""
+Timers measuring the phases of wizard requests (loading the storage,
+evaluating the conditions, building and validating the forms, ...). Set the
+``timer_class`` attribute of a ``WizardView`` to enable them.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('formtools.wizard.timing')
+
+
+class WizardTimer:
+    """
+    Collects the number of calls and the total duration of every phase of a
+    wizard request. Subclasses implement ``report()`` to do something with
+    them once the response is complete.
+    """
+
+    def __init__(self, wizard):
+        self.wizard = wizard
+        # Maps the phase names to (count, seconds) tuples.
+        self.phases = {}
+        self.duration = None
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        "Measures the phase `name`, phases may be nested."
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        count, total = self.phases.get(name, (0, 0.0))
+        self.phases[name] = (count + 1, total + seconds)
+
+    def finish(self, response):
+        """
+        Gets called when the response is complete, which is after rendering
+        it for template responses.
+        """
+        self.duration = time.perf_counter() - self.start
+        self.report(response)
+
+    def report(self, response):
+        pass
+
+
+class LoggingWizardTimer(WizardTimer):
+    """
+    Logs the durations of the phases to the ``formtools.wizard.timing``
+    logger. The record has ``wizard``, ``duration`` and ``phases`` (mapping
+    the phase names to their count and duration in seconds) attributes.
+    """
+    logger = logger
+    level = logging.INFO
+
+    def report(self, response):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        request = self.wizard.request
+        self.logger.log(
+            self.level, '%s %s %s: %.2fms (%s)',
+            self.wizard.__class__.__name__, request.method, request.path, self.duration * 1000,
+            ', '.join(
+                '%s: %.2fms/%d' % (name, seconds * 1000, count)
+                for name, (count, seconds) in self.phases.items()
+            ),
+            extra={
+                'wizard': self.wizard.__class__.__name__,
+                'duration': self.duration,
+                'phases': {
+                    name: {'count': count, 'seconds': seconds}
+                    for name, (count, seconds) in self.phases.items()
+                },
+            },
+        )
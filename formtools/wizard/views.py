@@ -1,11 +1,18 @@
+import inspect
+import json
 import re
 from collections import OrderedDict
+from contextlib import nullcontext
+from functools import lru_cache
 
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django import forms
 from django.core.exceptions import SuspiciousOperation
+from django.db import models
 from django.forms import formsets
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
 from django.utils.decorators import classonlymethod
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView
@@ -29,6 +36,206 @@ def normalize_name(name):
     return new.lower().strip('_')
 
 
+@lru_cache(maxsize=256)
+def analyze_form_list(form_list):
+    """
+    Analyzes a form list as passed to ``WizardView.as_view()`` and returns a
+    ``(steps, needs_file_storage)`` tuple. ``steps`` is a tuple of
+    (`step_name`, `form_class`) pairs, ``needs_file_storage`` tells whether
+    any of the forms contains a ``FileField``.
+
+    `form_list` has to be a tuple and the result is cached, so wizard views
+    sharing the same form list only do this work once.
+    """
+    steps = []
+    needs_file_storage = False
+    # walk through the passed form list
+    for i, form in enumerate(form_list):
+        if isinstance(form, (list, tuple)):
+            # if the element is a tuple, use the given step name.
+            step, form = str(form[0]), form[1]
+        else:
+            # if not, use a zero based counter as step name.
+            step = str(i)
+        steps.append((step, form))
+        if issubclass(form, formsets.BaseFormSet):
+            # if the element is based on BaseFormSet (FormSet/ModelFormSet)
+            # we need to check the underlying form.
+            form = form.form
+        # check if any form contains a FileField, if yes, a file_storage is
+        # needed to handle the uploads.
+        if any(isinstance(field, forms.FileField) for field in form.base_fields.values()):
+            needs_file_storage = True
+    return tuple(steps), needs_file_storage
+
+
+@lru_cache(maxsize=256)
+def get_instance_kwarg(form_class):
+    """
+    Returns the name of the keyword argument used to pass the result of
+    ``WizardView.get_form_instance()`` to `form_class`: ``'instance'`` for
+    a ``ModelForm`` or an ``InlineFormSet``, ``'queryset'`` for a
+    ``ModelFormSet`` and None for any other form.
+    """
+    if issubclass(form_class, (forms.ModelForm, forms.models.BaseInlineFormSet)):
+        return 'instance'
+    if issubclass(form_class, forms.models.BaseModelFormSet):
+        return 'queryset'
+    return None
+
+
+class InstanceLookup:
+    """
+    A model instance looked up by primary key, to be returned by
+    ``WizardView.get_form_instances()``. The lookups sharing the same model
+    class or queryset are fetched with a single ``in_bulk()`` query.
+    """
+    __slots__ = ('queryset', 'pk')
+
+    def __init__(self, queryset, pk):
+        # A model class or a queryset (e.g. using prefetch_related()).
+        self.queryset = queryset
+        self.pk = pk
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.queryset!r} pk={self.pk!r}>'
+
+
+def load_instances(instances):
+    """
+    Returns a copy of the `instances` dictionary with every
+    ``InstanceLookup`` replaced by its model instance (or None if it doesn't
+    exist) and every queryset evaluated, ordered the way ``ModelFormSet``
+    orders it. The lookups sharing a model class or queryset are fetched
+    with a single query.
+    """
+    lookups = {}
+    for value in instances.values():
+        if isinstance(value, InstanceLookup):
+            lookups.setdefault(value.queryset, set()).add(value.pk)
+    loaded = {}
+    for key, pks in lookups.items():
+        queryset = key if isinstance(key, models.QuerySet) else key._default_manager.all()
+        pk_field = queryset.model._meta.pk
+        loaded[key] = (pk_field, queryset.in_bulk({pk_field.to_python(pk) for pk in pks}))
+
+    result = {}
+    for step, value in instances.items():
+        if isinstance(value, InstanceLookup):
+            pk_field, bulk = loaded[value.queryset]
+            value = bulk.get(pk_field.to_python(value.pk))
+        elif isinstance(value, models.QuerySet):
+            if not value.ordered:
+                value = value.order_by(value.model._meta.pk.name)
+            # Evaluate the queryset, the forms share its result cache.
+            list(value)
+        result[step] = value
+    return result
+
+
+class MutationCounter:
+    """
+    Counts the mutations of a dictionary in its ``mutations`` attribute, so
+    that caches depending on its content can be checked in constant time.
+    """
+    mutations = 0
+
+    def __setitem__(self, key, value):
+        self.mutations += 1
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.mutations += 1
+        super().__delitem__(key)
+
+    def __ior__(self, other):
+        self.mutations += 1
+        return super().__ior__(other)
+
+    def clear(self):
+        self.mutations += 1
+        super().clear()
+
+    def pop(self, *args):
+        self.mutations += 1
+        return super().pop(*args)
+
+    def popitem(self, *args, **kwargs):
+        self.mutations += 1
+        return super().popitem(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self.mutations += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.mutations += 1
+        super().update(*args, **kwargs)
+
+
+class CountingDict(MutationCounter, dict):
+    pass
+
+
+class CountingOrderedDict(MutationCounter, OrderedDict):
+    def move_to_end(self, key, last=True):
+        self.mutations += 1
+        super().move_to_end(key, last=last)
+
+
+class StepIndex:
+    """
+    Ordered lookup table for the steps of a resolved form list. It maps every
+    step name to its position, so navigating between steps doesn't require
+    building and scanning a list of step names over and over again.
+    """
+    __slots__ = ('steps', 'positions')
+
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+        self.positions = {step: position for position, step in enumerate(self.steps)}
+
+    def __contains__(self, step):
+        return step in self.positions
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f'<StepIndex: {self.steps}>'
+
+    @property
+    def first(self):
+        "Returns the name of the first step."
+        return self.steps[0]
+
+    @property
+    def last(self):
+        "Returns the name of the last step."
+        return self.steps[-1]
+
+    def index(self, step):
+        "Returns the position of `step`, or None if `step` is unknown."
+        return self.positions.get(step)
+
+    def next(self, step):
+        "Returns the step after `step`, or None if there is none."
+        position = self.positions.get(step)
+        if position is None or position + 1 >= len(self.steps):
+            return None
+        return self.steps[position + 1]
+
+    def prev(self, step):
+        "Returns the step before `step`, or None if there is none."
+        position = self.positions.get(step)
+        if not position:
+            return None
+        return self.steps[position - 1]
+
+
 class StepsHelper:
 
     def __init__(self, wizard):
@@ -46,12 +253,12 @@ class StepsHelper:
     @property
     def all(self):
         "Returns the names of all steps/forms."
-        return list(self._wizard.get_form_list())
+        return list(self._wizard.get_resolved_steps())
 
     @property
     def count(self):
         "Returns the total number of steps/forms in this the wizard."
-        return len(self.all)
+        return len(self._wizard.get_resolved_steps())
 
     @property
     def current(self):
@@ -64,12 +271,12 @@ class StepsHelper:
     @property
     def first(self):
         "Returns the name of the first step."
-        return self.all[0]
+        return self._wizard.get_resolved_steps().first
 
     @property
     def last(self):
         "Returns the name of the last step."
-        return self.all[-1]
+        return self._wizard.get_resolved_steps().last
 
     @property
     def next(self):
@@ -102,10 +309,28 @@ class WizardView(TemplateView):
     class based views.
     """
     storage_name = None
+    storage_serializer = None
     form_list = None
     initial_dict = None
     instance_dict = None
     condition_dict = None
+    # Record a signed digest of every validated step, so that steps whose data
+    # didn't change since can be told apart when revalidating them (see
+    # is_step_validated()).
+    trust_validated_steps = False
+    # Names of the steps never considered as validated before.
+    always_revalidate_steps = ()
+    # Maps step names to the names of the steps their condition, initial data
+    # and form kwargs depend on. Steps missing from it depend on no other
+    # step, None means that every step may depend on all the others.
+    step_dependencies = None
+    # Store the results of the conditions of the steps in step_dependencies
+    # (or of the given steps only) with the wizard data, so that they are
+    # only evaluated again once the data of the steps they depend on changed.
+    cache_conditions = False
+    # Class measuring the phases of every request (see
+    # formtools.wizard.timing), None disables the measurements.
+    timer_class = None
     template_name = 'formtools/wizard/wizard_form.html'
 
     def __repr__(self):
@@ -163,38 +388,21 @@ class WizardView(TemplateView):
 
         form_list = form_list or kwargs.pop('form_list', getattr(cls, 'form_list', None)) or []
 
-        computed_form_list = OrderedDict()
-
         assert len(form_list) > 0, 'at least one form is needed'
 
-        # walk through the passed form list
-        for i, form in enumerate(form_list):
-            if isinstance(form, (list, tuple)):
-                # if the element is a tuple, add the tuple to the new created
-                # sorted dictionary.
-                computed_form_list[str(form[0])] = form[1]
-            else:
-                # if not, add the form with a zero based counter as unicode
-                computed_form_list[str(i)] = form
-
-        # walk through the new created list of forms
-        for form in computed_form_list.values():
-            if issubclass(form, formsets.BaseFormSet):
-                # if the element is based on BaseFormSet (FormSet/ModelFormSet)
-                # we need to override the form variable.
-                form = form.form
-            # check if any form contains a FileField, if yes, we need a
-            # file_storage added to the wizardview (by subclassing).
-            for field in form.base_fields.values():
-                if (isinstance(field, forms.FileField) and
-                        not hasattr(cls, 'file_storage')):
-                    raise NoFileStorageConfigured(
-                        "You need to define 'file_storage' in your "
-                        "wizard view in order to handle file uploads."
-                    )
+        steps, needs_file_storage = analyze_form_list(tuple(
+            tuple(form) if isinstance(form, list) else form for form in form_list
+        ))
+        # if any form contains a FileField, we need a file_storage added to
+        # the wizardview (by subclassing).
+        if needs_file_storage and not hasattr(cls, 'file_storage'):
+            raise NoFileStorageConfigured(
+                "You need to define 'file_storage' in your "
+                "wizard view in order to handle file uploads."
+            )
 
         # build the kwargs for the wizardview instances
-        kwargs['form_list'] = computed_form_list
+        kwargs['form_list'] = OrderedDict(steps)
         return kwargs
 
     def get_prefix(self, request, *args, **kwargs):
@@ -212,36 +420,157 @@ class WizardView(TemplateView):
         The form_list is generated once per wizard instance to avoid repeated
         expensive condition evaluations (e.g., database queries).
         """
-        # Sort condition_dict since its key order doesn't affect the result.
-        # Leave form_list unsorted so that reordering steps invalidates the cache.
-        cache_signature = (
-            tuple(sorted(self.condition_dict.items())),
-            tuple(self.form_list.items()),
-        )
+        form_list = self._resolve_form_list()
+        if form_list is self.form_list:
+            return form_list
+        return form_list.copy()
+
+    def _resolve_form_list(self):
+        """
+        Returns the cached resolved form list (without copying it), resolving
+        the conditions first if the cache is missing or outdated.
+        """
+        cache_signature = self._get_cache_signature()
         if (hasattr(self, '_resolved_form_list') and
             self._cache_signature == cache_signature):
-            return self._resolved_form_list.copy()
+            return self._resolved_form_list
 
         form_list = OrderedDict()
         if getattr(self, '_check_cond_started', False):
             # Guard against infinite recursion, in the case a get_form_list is
             # called in the context of a condition() call.
             return self.form_list
+        known = self._pop_known_conditions(cache_signature)
+        conditions = {}
         self._check_cond_started = True
-        for form_key, form_class in self.form_list.items():
-            # try to fetch the value from condition list, by default, the form
-            # gets passed to the new list.
-            condition = self.condition_dict.get(form_key, True)
-            if callable(condition):
-                # call the value if needed, passes the current instance.
-                condition = condition(self)
-            if condition:
-                form_list[form_key] = form_class
+        with self.time_phase('conditions'):
+            for form_key, form_class in self.form_list.items():
+                # try to fetch the value from condition list, by default, the
+                # form gets passed to the new list.
+                condition = self.condition_dict.get(form_key, True)
+                if callable(condition):
+                    result, digest = self._get_known_condition(form_key, known)
+                    if result is None:
+                        # call the value if needed, passes the current instance.
+                        result = bool(condition(self))
+                        if digest is not None:
+                            self.storage.set_condition_result(form_key, digest, result)
+                    conditions[form_key] = condition = result
+                if condition:
+                    form_list[form_key] = form_class
         del self._check_cond_started
+        return self._cache_form_list(form_list, cache_signature, conditions)
+
+    def _pop_known_conditions(self, cache_signature):
+        """
+        Returns the results of the conditions kept by _clear_caches(), if they
+        were evaluated with the same conditions and form list.
+        """
+        signature, known = self.__dict__.pop('_known_conditions', (None, {}))
+        return known if signature == cache_signature else {}
+
+    def _get_known_condition(self, step, known):
+        """
+        Returns the result of the condition of `step` if it is known from this
+        request or cached from a previous one (None otherwise), and the digest
+        to cache a new result with.
+        """
+        if step in known:
+            return known[step], None
+        digest = self.get_condition_digest(step)
+        if digest is None:
+            return None, None
+        return self.storage.get_condition_result(step, digest), digest
+
+    def _get_cache_signature(self):
+        form_list, condition_dict = self.form_list, self.condition_dict
+        if isinstance(form_list, MutationCounter) and isinstance(condition_dict, MutationCounter):
+            # The copies made by setup() count their mutations.
+            return (id(form_list), form_list.mutations, id(condition_dict), condition_dict.mutations)
+        # Sort condition_dict since its key order doesn't affect the result.
+        # Leave form_list unsorted so that reordering steps invalidates the cache.
+        return (
+            tuple(sorted(self.condition_dict.items())),
+            tuple(self.form_list.items()),
+        )
+
+    def _cache_form_list(self, form_list, cache_signature, conditions):
         self._resolved_form_list = form_list
+        self._step_index = StepIndex(form_list)
         self._cache_signature = cache_signature
+        self._condition_results = conditions
         return form_list
 
+    def _clear_caches(self, step=None):
+        """
+        Clears the validated forms and the results of the conditions affected
+        by a change of the data of `step` (see get_affected_steps()), or all
+        of them if `step` is None.
+        """
+        affected = set(self.form_list) if step is None else self.get_affected_steps(step)
+        self._validated_forms.pop(step, None)
+        for name in affected:
+            self._validated_forms.pop(name, None)
+        if not hasattr(self, '_resolved_form_list'):
+            return
+        if affected.isdisjoint(self._condition_results):
+            # None of the conditions depends on the changed data.
+            return
+        self._known_conditions = (self._cache_signature, {
+            name: result for name, result in self._condition_results.items() if name not in affected
+        })
+        for attr_name in ('_resolved_form_list', '_step_index', '_cache_signature', '_condition_results'):
+            self.__dict__.pop(attr_name, None)
+
+    def get_step_dependencies(self, step):
+        """
+        Returns the names of the steps the condition, initial data and form
+        kwargs of `step` depend on, directly or through other steps (see
+        `step_dependencies`).
+        """
+        dependencies = self.step_dependencies or {}
+        found = set()
+        pending = list(dependencies.get(step, ()))
+        while pending:
+            dependency = pending.pop()
+            if dependency not in found:
+                found.add(dependency)
+                pending.extend(dependencies.get(dependency, ()))
+        return found
+
+    def get_affected_steps(self, step):
+        """
+        Returns the names of the steps whose condition, initial data or form
+        kwargs depend on the data of `step`, directly or through other steps.
+        All steps are affected unless `step_dependencies` is set.
+        """
+        if self.step_dependencies is None:
+            return set(self.form_list)
+        return {name for name in self.form_list if step in self.get_step_dependencies(name)}
+
+    def get_resolved_steps(self):
+        """
+        Returns a :class:`StepIndex` for the steps of the current form list.
+        The index is built once per resolved form list and is shared by all
+        navigation helpers (``steps``, ``get_next_step()``, ...).
+        """
+        if type(self).get_form_list is not WizardView.get_form_list:
+            # Respect a customized get_form_list(), it may return anything.
+            return StepIndex(self.get_form_list())
+        form_list = self._resolve_form_list()
+        if form_list is self.form_list:
+            # Conditions are being evaluated, nothing is cached yet.
+            return StepIndex(form_list)
+        return self._step_index
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # Copies of the form list and the conditions for this request, which
+        # count their mutations so that the resolved form list is validated
+        # without comparing their content on every step lookup.
+        self.form_list = CountingOrderedDict(self.form_list)
+        self.condition_dict = CountingDict(self.condition_dict)
+
     def dispatch(self, request, *args, **kwargs):
         """
         This method gets called by the routing engine. The first argument is
@@ -252,18 +581,63 @@ class WizardView(TemplateView):
         After processing the request using the `dispatch` method, the
         response gets updated by the storage engine (for example add cookies).
         """
-        # add the storage engine to the current wizardview instance
+        self.timer = self.get_timer()
+        with self.time_phase('storage'):
+            self._setup_storage(request, *args, **kwargs)
+            if self.timer is not None:
+                # Load the data now, to measure it.
+                self.storage.data  # noqa: B018
+        response = super().dispatch(request, *args, **kwargs)
+
+        # update the response (e.g. adding cookies)
+        with self.time_phase('update_response'):
+            self.storage.update_response(response)
+        self._finish_timer(response)
+        return response
+
+    def get_timer(self):
+        """
+        Returns the timer measuring the phases of the current request, an
+        instance of :attr:`timer_class` or None.
+        """
+        if self.timer_class is None:
+            return None
+        return self.timer_class(self)
+
+    def time_phase(self, name):
+        """
+        Returns a context manager measuring the phase `name` of the current
+        request with the timer, if any.
+        """
+        timer = getattr(self, 'timer', None)
+        if timer is None:
+            return nullcontext()
+        return timer.phase(name)
+
+    def _finish_timer(self, response):
+        if self.timer is None:
+            return
+        if hasattr(response, 'render') and not response.is_rendered:
+            # Include the rendering of template responses.
+            response.add_post_render_callback(self.timer.finish)
+        else:
+            self.timer.finish(response)
+
+    def _setup_storage(self, request, *args, **kwargs):
+        """
+        Adds the storage engine (as `self.storage`) and the steps helper (as
+        `self.steps`) to the current wizardview instance.
+        """
         self.prefix = self.get_prefix(request, *args, **kwargs)
+        storage_kwargs = {}
+        if self.storage_serializer is not None:
+            storage_kwargs['serializer'] = self.storage_serializer
         self.storage = get_storage(
             self.storage_name, self.prefix, request,
-            getattr(self, 'file_storage', None),
+            getattr(self, 'file_storage', None), **storage_kwargs
         )
         self.steps = StepsHelper(self)
-        response = super().dispatch(request, *args, **kwargs)
-
-        # update the response (e.g. adding cookies)
-        self.storage.update_response(response)
-        return response
+        self._validated_forms = {}
 
     def get(self, request, *args, **kwargs):
         """
@@ -291,34 +665,27 @@ class WizardView(TemplateView):
         # contains a valid step name. If one was found, render the requested
         # form. (This makes stepping back a lot easier).
         wizard_goto_step = self.request.POST.get('wizard_goto_step', None)
-        if wizard_goto_step and wizard_goto_step in self.get_form_list():
+        if wizard_goto_step and wizard_goto_step in self.get_resolved_steps():
             return self.render_goto_step(wizard_goto_step)
 
-        # Check if form was refreshed
-        management_form = ManagementForm(self.request.POST, prefix=self.prefix)
-        if not management_form.is_valid():
-            raise SuspiciousOperation(_('ManagementForm data is missing or has been tampered.'))
-
-        form_current_step = management_form.cleaned_data['current_step']
-        if (form_current_step != self.steps.current and
-                self.storage.current_step is not None):
-            # form refreshed, change current step
-            self.storage.current_step = form_current_step
+        self._process_management_form()
 
         # get the form for the current step
         form = self.get_form(data=self.request.POST, files=self.request.FILES)
 
         # and try to validate
-        if form.is_valid():
+        with self.time_phase('validation'):
+            is_valid = form.is_valid()
+        if is_valid:
             # if the form is valid, store the cleaned data and files.
-            self.storage.set_step_data(self.steps.current, self.process_step(form))
-            self.storage.set_step_files(self.steps.current, self.process_step_files(form))
-            # Clear caches as changed step data could affect conditions
-            del self._resolved_form_list
-            del self._cache_signature
-            for attr_name in list(self.__dict__.keys()):
-                if attr_name.startswith('_cleaned_data_cache_'):
-                    delattr(self, attr_name)
+            with self.time_phase('set_step_data'):
+                self.storage.set_step_data(self.steps.current, self.process_step(form))
+            with self.time_phase('set_step_files'):
+                self.storage.set_step_files(self.steps.current, self.process_step_files(form))
+            self._clear_caches(self.steps.current)
+            if self.trust_validated_steps:
+                self.storage.set_validation_digest(
+                    self.steps.current, self.get_step_digest(self.steps.current))
 
             # check if the current step is the last step
             if self.steps.current == self.steps.last:
@@ -329,6 +696,18 @@ class WizardView(TemplateView):
                 return self.render_next_step(form)
         return self.render(form)
 
+    def _process_management_form(self):
+        # Check if form was refreshed
+        management_form = ManagementForm(self.request.POST, prefix=self.prefix)
+        if not management_form.is_valid():
+            raise SuspiciousOperation(_('ManagementForm data is missing or has been tampered.'))
+
+        form_current_step = management_form.cleaned_data['current_step']
+        if (form_current_step != self.steps.current and
+                self.storage.current_step is not None):
+            # form refreshed, change current step
+            self.storage.current_step = form_current_step
+
     def render_next_step(self, form, **kwargs):
         """
         This method gets called when the next step/form should be rendered.
@@ -367,11 +746,7 @@ class WizardView(TemplateView):
         final_forms = OrderedDict()
         # walk through the form list and try to validate the data again.
         for form_key in self.get_form_list():
-            form_obj = self.get_form(
-                step=form_key,
-                data=self.storage.get_step_data(form_key),
-                files=self.storage.get_step_files(form_key)
-            )
+            form_obj = self.get_validated_form(form_key)
             if not form_obj.is_valid():
                 return self.render_revalidation_failure(form_key, form_obj, **kwargs)
             final_forms[form_key] = form_obj
@@ -379,7 +754,8 @@ class WizardView(TemplateView):
         # render the done view and reset the wizard before returning the
         # response. This is needed to prevent from rendering done with the
         # same data twice.
-        done_response = self.done(list(final_forms.values()), form_dict=final_forms, **kwargs)
+        with self.time_phase('done'):
+            done_response = self.done(list(final_forms.values()), form_dict=final_forms, **kwargs)
         self.storage.reset()
         return done_response
 
@@ -410,8 +786,32 @@ class WizardView(TemplateView):
         as `instance`. If no instance object was provided while initializing
         the form wizard, None will be returned.
         """
+        instances = self.get_loaded_instances()
+        if step in instances:
+            return instances[step]
         return self.instance_dict.get(step, None)
 
+    def get_form_instances(self):
+        """
+        Returns a dictionary mapping step names to the model instances (or
+        ``InstanceLookup`` objects) and querysets of the steps based on a
+        ``ModelForm`` or a ``ModelFormSet``, which take precedence over
+        `instance_dict`. They are loaded in batch once per request, see
+        get_loaded_instances().
+        """
+        return {}
+
+    def get_loaded_instances(self):
+        """
+        Returns the instances and querysets of get_form_instances() once they
+        are loaded. They are loaded on first use and shared by all the forms
+        built during the request.
+        """
+        if not hasattr(self, '_loaded_instances'):
+            with self.time_phase('instances'):
+                self._loaded_instances = load_instances(self.get_form_instances())
+        return self._loaded_instances
+
     def get_form_kwargs(self, step=None):
         """
         Returns the keyword arguments for instantiating the form
@@ -431,23 +831,23 @@ class WizardView(TemplateView):
         if step is None:
             step = self.steps.current
         form_class = self.get_form_list()[step]
-        # prepare the kwargs for the form instance.
-        kwargs = self.get_form_kwargs(step)
-        kwargs.update({
-            'data': data,
-            'files': files,
-            'prefix': self.get_form_prefix(step, form_class),
-            'initial': self.get_form_initial(step),
-        })
-        if issubclass(form_class, (forms.ModelForm, forms.models.BaseInlineFormSet)):
-            # If the form is based on ModelForm or InlineFormSet,
-            # add instance if available and not previously set.
-            kwargs.setdefault('instance', self.get_form_instance(step))
-        elif issubclass(form_class, forms.models.BaseModelFormSet):
-            # If the form is based on ModelFormSet, add queryset if available
-            # and not previous set.
-            kwargs.setdefault('queryset', self.get_form_instance(step))
-        return form_class(**kwargs)
+        with self.time_phase('get_form'):
+            # prepare the kwargs for the form instance.
+            kwargs = self.get_form_kwargs(step)
+            kwargs.update({
+                'data': data,
+                'files': files,
+                'prefix': self.get_form_prefix(step, form_class),
+                'initial': self.get_form_initial(step),
+            })
+            instance_kwarg = get_instance_kwarg(form_class)
+            if instance_kwarg is not None:
+                # If the form is based on ModelForm or InlineFormSet, add
+                # instance if available and not previously set. If the form is
+                # based on ModelFormSet, add queryset if available and not
+                # previously set.
+                kwargs.setdefault(instance_kwarg, self.get_form_instance(step))
+            return form_class(**kwargs)
 
     def process_step(self, form):
         """
@@ -486,6 +886,82 @@ class WizardView(TemplateView):
         """
         return form.files
 
+    def get_validated_form(self, step):
+        """
+        Returns the form for the given `step`, bound to the stored data and
+        files and validated. The validated forms are cached for the duration
+        of the request, as long as the stored data of the step doesn't change.
+        """
+        data = self.storage.get_step_data(step)
+        files = self.storage.get_step_files(step)
+        fingerprint = self._get_step_fingerprint(data, files)
+        if step in self._validated_forms and self._validated_forms[step][0] == fingerprint:
+            return self._validated_forms[step][1]
+        form_obj = self.get_form(step=step, data=data, files=files)
+        form_obj.wizard_validated = self.is_step_validated(step)
+        with self.time_phase('validation'):
+            form_obj.is_valid()
+        self._validated_forms[step] = (fingerprint, form_obj)
+        return form_obj
+
+    def _get_step_fingerprint(self, data, files):
+        return (
+            None if data is None else dict(data.lists()),
+            None if files is None else {field: (f.name, f.size) for field, f in files.items()},
+        )
+
+    def get_step_digest(self, step):
+        """
+        Returns a signed digest of the stored data and files of `step` and of
+        the names of the steps leading to it. The data of these steps isn't
+        included.
+        """
+        steps = self.get_resolved_steps()
+        index = steps.index(step)
+        value = json.dumps([
+            self.prefix,
+            step,
+            list(steps)[:index],
+            self._get_step_fingerprint(
+                self.storage.get_step_data(step), self.storage.get_step_files(step)),
+        ], sort_keys=True, default=str)
+        return salted_hmac('formtools.wizard.views.WizardView', value).hexdigest()
+
+    def get_condition_digest(self, step):
+        """
+        Returns a signed digest of the stored data and files of the steps the
+        condition of `step` depends on (see `step_dependencies`), or None if
+        the result of the condition isn't cached across requests.
+        """
+        if not self.cache_conditions or step not in (self.step_dependencies or {}):
+            return None
+        if self.cache_conditions is not True and step not in self.cache_conditions:
+            return None
+        value = json.dumps([self.prefix, step, [
+            [dependency, self._get_step_fingerprint(
+                self.storage.get_step_data(dependency), self.storage.get_step_files(dependency))]
+            for dependency in sorted(self.get_step_dependencies(step))
+        ]], sort_keys=True, default=str)
+        return salted_hmac('formtools.wizard.views.WizardView.condition', value).hexdigest()
+
+    def is_step_validated(self, step):
+        """
+        Returns True if `trust_validated_steps` is set and the stored data of
+        `step` (and the names of the steps leading to it) didn't change since
+        it was validated in a previous request. Steps in
+        `always_revalidate_steps` are never considered as validated.
+
+        Forms validated by ``get_validated_form()`` get the result as their
+        ``wizard_validated`` attribute, so that they can skip expensive checks.
+        """
+        if not self.trust_validated_steps or step in self.always_revalidate_steps:
+            return False
+        if getattr(self, '_check_cond_started', False):
+            # The steps are unknown while the conditions are being evaluated.
+            return False
+        digest = self.storage.get_validation_digest(step)
+        return digest is not None and constant_time_compare(digest, self.get_step_digest(step))
+
     def get_all_cleaned_data(self):
         """
         Returns a merged dictionary of all step cleaned_data dictionaries.
@@ -494,11 +970,7 @@ class WizardView(TemplateView):
         """
         cleaned_data = {}
         for form_key in self.get_form_list():
-            form_obj = self.get_form(
-                step=form_key,
-                data=self.storage.get_step_data(form_key),
-                files=self.storage.get_step_files(form_key)
-            )
+            form_obj = self.get_validated_form(form_key)
             if form_obj.is_valid():
                 if isinstance(form_obj.cleaned_data, (tuple, list)):
                     cleaned_data.update({
@@ -515,20 +987,9 @@ class WizardView(TemplateView):
         If the data doesn't validate, None will be returned.
         """
         if step in self.form_list:
-            cache_key = f'_cleaned_data_cache_{step}'
-            if cached_data := getattr(self, cache_key, None):
-                return cached_data
-            form_obj = self.get_form(
-                step=step,
-                data=self.storage.get_step_data(step),
-                files=self.storage.get_step_files(step),
-            )
+            form_obj = self.get_validated_form(step)
             if form_obj.is_valid():
-                cleaned_data = form_obj.cleaned_data
-                setattr(self, cache_key, cleaned_data)
-                return cleaned_data
-            else:
-                setattr(self, cache_key, None)
+                return form_obj.cleaned_data
         return None
 
     def get_next_step(self, step=None):
@@ -541,14 +1002,10 @@ class WizardView(TemplateView):
         """
         if step is None:
             step = self.steps.current
-        form_list = self.get_form_list()
-        keys = list(form_list.keys())
-        if step not in keys:
-            return self.steps.first
-        key = keys.index(step) + 1
-        if len(keys) > key:
-            return keys[key]
-        return None
+        steps = self.get_resolved_steps()
+        if step not in steps:
+            return steps.first
+        return steps.next(step)
 
     def get_prev_step(self, step=None):
         """
@@ -560,14 +1017,7 @@ class WizardView(TemplateView):
         """
         if step is None:
             step = self.steps.current
-        form_list = self.get_form_list()
-        keys = list(form_list.keys())
-        if step not in keys:
-            return None
-        key = keys.index(step) - 1
-        if key >= 0:
-            return keys[key]
-        return None
+        return self.get_resolved_steps().prev(step)
 
     def get_step_index(self, step=None):
         """
@@ -578,10 +1028,7 @@ class WizardView(TemplateView):
         """
         if step is None:
             step = self.steps.current
-        keys = list(self.get_form_list().keys())
-        if step in keys:
-            return keys.index(step)
-        return None
+        return self.get_resolved_steps().index(step)
 
     def get_context_data(self, form, **kwargs):
         """
@@ -618,8 +1065,9 @@ class WizardView(TemplateView):
         Returns a ``HttpResponse`` containing all needed context data.
         """
         form = form or self.get_form()
-        context = self.get_context_data(form=form, **kwargs)
-        return self.render_to_response(context)
+        with self.time_phase('render'):
+            context = self.get_context_data(form=form, **kwargs)
+            return self.render_to_response(context)
 
     def done(self, form_list, **kwargs):
         """
@@ -706,7 +1154,7 @@ class NamedUrlWizardView(WizardView):
             )
             return self.render(form, **kwargs)
 
-        elif step_url in self.get_form_list():
+        elif step_url in self.get_resolved_steps():
             self.storage.current_step = step_url
             return self.render(
                 self.get_form(
@@ -727,7 +1175,7 @@ class NamedUrlWizardView(WizardView):
         is super'd from WizardView.
         """
         wizard_goto_step = self.request.POST.get('wizard_goto_step', None)
-        if wizard_goto_step and wizard_goto_step in self.get_form_list():
+        if wizard_goto_step and wizard_goto_step in self.get_resolved_steps():
             return self.render_goto_step(wizard_goto_step)
         return super().post(*args, **kwargs)
 
@@ -787,3 +1235,270 @@ class NamedUrlCookieWizardView(NamedUrlWizardView):
     A NamedUrlFormWizard with pre-configured CookieStorageBackend.
     """
     storage_name = 'formtools.wizard.storage.cookie.CookieStorage'
+
+
+class AsyncWizardView(WizardView):
+    """
+    A WizardView handling requests asynchronously. The storage backend loads
+    and saves the data without blocking the event loop, ``done()`` and the
+    callables of the condition_dict can be coroutine functions. The forms and
+    the context are built in a thread, so the synchronous hooks like
+    ``get_form_kwargs()`` or ``get_context_data()`` can use the ORM.
+
+    ``get()``, ``post()``, ``render_next_step()``, ``render_goto_step()``,
+    ``render_done()`` and ``done()`` are coroutine functions in subclasses.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Asynchronous version of WizardView.dispatch(). The data is loaded by
+        the storage and the conditions are evaluated before handling the
+        request.
+        """
+        self.timer = self.get_timer()
+        with self.time_phase('storage'):
+            self._setup_storage(request, *args, **kwargs)
+            await self.storage.aload()
+        await self.aget_form_list()
+        if type(self).get_form_instances is not WizardView.get_form_instances:
+            # Load the instances in a thread, the forms are built synchronously.
+            await sync_to_async(self.get_loaded_instances)()
+        # Skip WizardView.dispatch(), it updates the response synchronously.
+        response = await super(WizardView, self).dispatch(request, *args, **kwargs)
+        with self.time_phase('update_response'):
+            await self.storage.asave(response)
+        self._finish_timer(response)
+        return response
+
+    async def aget_form_list(self):
+        """
+        Asynchronous version of get_form_list(). Coroutine functions (and
+        conditions returning an awaitable) are awaited, the other conditions
+        are called in a thread.
+        """
+        cache_signature = self._get_cache_signature()
+        if (type(self).get_form_list is not WizardView.get_form_list or
+                getattr(self, '_check_cond_started', False) or
+                (hasattr(self, '_resolved_form_list') and self._cache_signature == cache_signature)):
+            return self.get_form_list()
+
+        form_list = OrderedDict()
+        known = self._pop_known_conditions(cache_signature)
+        conditions = {}
+        self._check_cond_started = True
+        with self.time_phase('conditions'):
+            for form_key, form_class in self.form_list.items():
+                condition = self.condition_dict.get(form_key, True)
+                if callable(condition):
+                    result, digest = self._get_known_condition(form_key, known)
+                    if result is None:
+                        if iscoroutinefunction(condition):
+                            result = condition(self)
+                        else:
+                            # Sync conditions may access the database.
+                            result = await sync_to_async(condition)(self)
+                        if inspect.isawaitable(result):
+                            result = await result
+                        result = bool(result)
+                        if digest is not None:
+                            self.storage.set_condition_result(form_key, digest, result)
+                    conditions[form_key] = condition = result
+                if condition:
+                    form_list[form_key] = form_class
+        del self._check_cond_started
+        return self._cache_form_list(form_list, cache_signature, conditions).copy()
+
+    async def get(self, request, *args, **kwargs):
+        """
+        This method handles GET requests, resetting the wizard data and
+        rendering the first step.
+        """
+        return await sync_to_async(super().get)(request, *args, **kwargs)
+
+    async def post(self, *args, **kwargs):
+        """
+        This method handles POST requests, see WizardView.post().
+        """
+        wizard_goto_step = self.request.POST.get('wizard_goto_step', None)
+        if wizard_goto_step and wizard_goto_step in self.get_resolved_steps():
+            return await self.render_goto_step(wizard_goto_step)
+
+        self._process_management_form()
+
+        # get the form for the current step
+        form = await self.aget_form(data=self.request.POST, files=self.request.FILES)
+
+        # and try to validate
+        with self.time_phase('validation'):
+            is_valid = await self.avalidate_form(form)
+        if is_valid:
+            # if the form is valid, store the cleaned data and files.
+            with self.time_phase('set_step_data'):
+                self.storage.set_step_data(self.steps.current, await sync_to_async(self.process_step)(form))
+            with self.time_phase('set_step_files'):
+                await self.storage.aset_step_files(self.steps.current, self.process_step_files(form))
+            self._clear_caches(self.steps.current)
+            await self.aget_form_list()
+            if self.trust_validated_steps:
+                self.storage.set_validation_digest(
+                    self.steps.current, self.get_step_digest(self.steps.current))
+
+            # check if the current step is the last step
+            if self.steps.current == self.steps.last:
+                # no more steps, render done view
+                return await self.render_done(form, **kwargs)
+            else:
+                # proceed to the next step
+                return await self.render_next_step(form)
+        return await self.arender(form)
+
+    async def aget_form(self, step=None, data=None, files=None):
+        """
+        Asynchronous version of get_form(). The form hooks like
+        get_form_kwargs() or get_form_instance() may access the database, so
+        the form is built in a thread.
+        """
+        return await sync_to_async(self.get_form)(step=step, data=data, files=files)
+
+    async def arender(self, form=None, **kwargs):
+        """
+        Asynchronous version of render(), get_context_data() is called in a
+        thread.
+        """
+        return await sync_to_async(self.render)(form, **kwargs)
+
+    async def avalidate_form(self, form):
+        """
+        Returns whether `form` is valid. Validating a form may access the
+        database, so it's done in a thread. You may override this method to
+        validate forms known not to block in the event loop.
+        """
+        return await sync_to_async(form.is_valid)()
+
+    async def render_next_step(self, form, **kwargs):
+        return await sync_to_async(super().render_next_step)(form, **kwargs)
+
+    async def render_goto_step(self, goto_step, **kwargs):
+        return await sync_to_async(super().render_goto_step)(goto_step, **kwargs)
+
+    async def render_done(self, form, **kwargs):
+        """
+        Asynchronous version of WizardView.render_done(). `done()` is awaited
+        if it's a coroutine function (or returns an awaitable), and called in
+        a thread otherwise.
+        """
+        final_forms = OrderedDict()
+        # walk through the form list and try to validate the data again.
+        for form_key in self.get_form_list():
+            form_obj = await self.aget_validated_form(form_key)
+            if not form_obj.is_valid():
+                return await sync_to_async(self.render_revalidation_failure)(form_key, form_obj, **kwargs)
+            final_forms[form_key] = form_obj
+
+        with self.time_phase('done'):
+            done = self.done if iscoroutinefunction(self.done) else sync_to_async(self.done)
+            done_response = done(list(final_forms.values()), form_dict=final_forms, **kwargs)
+            if inspect.isawaitable(done_response):
+                done_response = await done_response
+        self.storage.reset()
+        return done_response
+
+    async def aget_validated_form(self, step):
+        "Asynchronous version of get_validated_form()."
+        data = self.storage.get_step_data(step)
+        files = await self.storage.aget_step_files(step)
+        fingerprint = self._get_step_fingerprint(data, files)
+        if step in self._validated_forms and self._validated_forms[step][0] == fingerprint:
+            return self._validated_forms[step][1]
+        form_obj = await self.aget_form(step=step, data=data, files=files)
+        form_obj.wizard_validated = self.is_step_validated(step)
+        with self.time_phase('validation'):
+            await self.avalidate_form(form_obj)
+        self._validated_forms[step] = (fingerprint, form_obj)
+        return form_obj
+
+    async def aget_all_cleaned_data(self):
+        "Asynchronous version of get_all_cleaned_data()."
+        cleaned_data = {}
+        for form_key in self.get_form_list():
+            form_obj = await self.aget_validated_form(form_key)
+            if form_obj.is_valid():
+                if isinstance(form_obj.cleaned_data, (tuple, list)):
+                    cleaned_data.update({
+                        'formset-%s' % form_key: form_obj.cleaned_data
+                    })
+                else:
+                    cleaned_data.update(form_obj.cleaned_data)
+        return cleaned_data
+
+    async def aget_cleaned_data_for_step(self, step):
+        "Asynchronous version of get_cleaned_data_for_step()."
+        if step in self.form_list:
+            form_obj = await self.aget_validated_form(step)
+            if form_obj.is_valid():
+                return form_obj.cleaned_data
+        return None
+
+
+class AsyncSessionWizardView(AsyncWizardView):
+    """
+    An AsyncWizardView with pre-configured SessionStorage backend.
+    """
+    storage_name = 'formtools.wizard.storage.session.SessionStorage'
+
+
+class AsyncCookieWizardView(AsyncWizardView):
+    """
+    An AsyncWizardView with pre-configured CookieStorage backend.
+    """
+    storage_name = 'formtools.wizard.storage.cookie.CookieStorage'
+
+
+class AsyncNamedUrlWizardView(AsyncWizardView, NamedUrlWizardView):
+    """
+    An AsyncWizardView with URL named steps support.
+    """
+
+    async def get(self, *args, **kwargs):
+        """
+        This renders the form or, if needed, does the http redirects.
+        """
+        step_url = kwargs.get('step')
+        if step_url == self.done_step_name:
+            last_step = self.steps.last
+            form = await self.aget_form(
+                step=last_step,
+                data=self.storage.get_step_data(last_step),
+                files=await self.storage.aget_step_files(last_step),
+            )
+            return await self.render_done(form, **kwargs)
+        return await sync_to_async(NamedUrlWizardView.get)(self, *args, **kwargs)
+
+    async def render_next_step(self, form, **kwargs):
+        return NamedUrlWizardView.render_next_step(self, form, **kwargs)
+
+    async def render_goto_step(self, goto_step, **kwargs):
+        return NamedUrlWizardView.render_goto_step(self, goto_step, **kwargs)
+
+    async def render_done(self, form, **kwargs):
+        """
+        When rendering the done view, we have to redirect first (if the URL
+        name doesn't fit).
+        """
+        if kwargs.get('step') != self.done_step_name:
+            return redirect(self.get_step_url(self.done_step_name))
+        return await super().render_done(form, **kwargs)
+
+
+class AsyncNamedUrlSessionWizardView(AsyncNamedUrlWizardView):
+    """
+    An AsyncNamedUrlWizardView with pre-configured SessionStorage backend.
+    """
+    storage_name = 'formtools.wizard.storage.session.SessionStorage'
+
+
+class AsyncNamedUrlCookieWizardView(AsyncNamedUrlWizardView):
+    """
+    An AsyncNamedUrlWizardView with pre-configured CookieStorage backend.
+    """
+    storage_name = 'formtools.wizard.storage.cookie.CookieStorage'
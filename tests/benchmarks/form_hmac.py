@@ -0,0 +1,99 @@
+"""
+Measures the queries and time saved by form_hmac() reusing the cleaned data
+of validated forms, as done by the FormPreview when rendering the preview and
+checking the security hash.
+
+Run it from the repository root with::
+
+    python -m tests.benchmarks.form_hmac
+
+DJANGO_SETTINGS_MODULE defaults to ``tests.settings``.
+"""
+import argparse
+import json
+import os
+import timeit
+from unittest import mock
+
+import django
+from django import forms
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from formtools.utils import HASH_VERSIONS, form_hmac
+
+
+def get_form_class(choice_fields, queryset):
+    fields = {'name': forms.CharField()}
+    for i in range(choice_fields):
+        fields['user%d' % i] = forms.ModelChoiceField(queryset=queryset)
+        fields['users%d' % i] = forms.ModelMultipleChoiceField(queryset=queryset)
+    return type('BenchmarkForm', (forms.Form,), fields)
+
+
+def get_data(choice_fields, pks):
+    data = {'name': 'Jane Doe'}
+    for i in range(choice_fields):
+        data['user%d' % i] = pks[0]
+        data['users%d' % i] = pks
+    return data
+
+
+def validate_and_hash(form_class, data, version):
+    # What FormPreview does in preview_post() and post_post().
+    form = form_class(data)
+    assert form.is_valid()
+    return form_hmac(form, version=version)
+
+
+def run(form_class, data, number):
+    results = []
+    for version in HASH_VERSIONS:
+        for reuse in (False, True):
+            patcher = mock.patch('formtools.utils._get_cleaned_values', return_value={})
+            if not reuse:
+                patcher.start()
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    validate_and_hash(form_class, data, version)
+                seconds = timeit.timeit(lambda: validate_and_hash(form_class, data, version), number=number)
+            finally:
+                if not reuse:
+                    patcher.stop()
+            results.append({
+                'version': version,
+                'reuse_cleaned_data': reuse,
+                'queries': len(queries),
+                'us': seconds / number * 1e6,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--choice-fields', type=int, default=5)
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON.')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    django.setup()
+    User = apps.get_model('auth', 'User')  # noqa: N806
+
+    # Use an in-memory test database.
+    connection.creation.create_test_db(verbosity=0)
+    pks = [User.objects.create(username='user%d' % i).pk for i in range(3)]
+    form_class = get_form_class(args.choice_fields, User.objects.all())
+    results = run(form_class, get_data(args.choice_fields, pks), args.number)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('%-8s %-20s %8s %12s' % ('version', 'reuse cleaned data', 'queries', 'time (us)'))
+    for result in results:
+        print('%(version)-8d %(reuse_cleaned_data)-20s %(queries)8d %(us)12.1f' % result)
+
+
+if __name__ == '__main__':
+    main()
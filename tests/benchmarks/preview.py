@@ -0,0 +1,180 @@
+"""
+Measures the time and memory of form_hmac() and of FormPreview round trips.
+
+Run it from the repository root with::
+
+    python -m tests.benchmarks.preview
+
+DJANGO_SETTINGS_MODULE defaults to ``tests.settings``.
+
+The security hash of every hash version is timed for validated forms of
+various widths, for forms made of fields of a single type and for file
+uploads of various sizes. A round trip posts a form to a FormPreview (the
+preview stage) and posts it again with the hash (the post stage) through the
+test client. The peak memory allocated by a call is measured separately with
+tracemalloc, since tracing slows it down.
+"""
+import argparse
+import json
+import os
+import re
+import time
+import timeit
+import tracemalloc
+from http import HTTPStatus
+
+import django
+from django import forms
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import path
+
+from formtools.preview import FormPreview
+from formtools.utils import HASH_VERSIONS, form_hmac
+
+# Field class and submitted value of the fields of every type.
+FIELD_TYPES = {
+    'char': (forms.CharField, 'Lorem ipsum dolor sit amet'),
+    'integer': (forms.IntegerField, '42'),
+    'decimal': (forms.DecimalField, '1234.56'),
+    'boolean': (forms.BooleanField, 'on'),
+    'date': (forms.DateField, '2006-10-25'),
+    'datetime': (forms.DateTimeField, '2006-10-25 14:30:59'),
+    'email': (forms.EmailField, 'jane@example.com'),
+    'multiple_choice': (
+        lambda: forms.MultipleChoiceField(choices=[(str(i), i) for i in range(5)]),
+        ['1', '3'],
+    ),
+}
+
+
+class URLConf:
+    def __init__(self, urlpatterns):
+        self.urlpatterns = urlpatterns
+
+
+class BenchmarkPreview(FormPreview):
+    def done(self, request, cleaned_data):
+        return HttpResponse('done')
+
+
+def get_form(field_type, width):
+    field_class, value = FIELD_TYPES[field_type]
+    names = ['field%d' % i for i in range(width)]
+    form_class = type('BenchmarkForm', (forms.Form,), {name: field_class() for name in names})
+    return form_class, dict.fromkeys(names, value)
+
+
+def measure(func, number):
+    """
+    Returns the time per call in microseconds and the peak memory allocated
+    by a call in kilobytes.
+    """
+    func()
+    seconds = timeit.timeit(func, number=number)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+    return seconds / number * 1e6, peak / 1024
+
+
+def hash_validated(form_class, data, files=None):
+    form = form_class(data, files)
+    if not form.is_valid():
+        raise AssertionError(form.errors)
+    return lambda version: form_hmac(form, version=version)
+
+
+def run_widths(args):
+    for width in args.widths:
+        hmac = hash_validated(*get_form('char', width))
+        for version in HASH_VERSIONS:
+            yield 'width', '%d fields' % width, version, lambda hmac=hmac, version=version: hmac(version)
+
+
+def run_types(args):
+    for field_type in FIELD_TYPES:
+        hmac = hash_validated(*get_form(field_type, args.type_width))
+        for version in HASH_VERSIONS:
+            yield 'type', field_type, version, lambda hmac=hmac, version=version: hmac(version)
+
+
+def run_uploads(args):
+    form_class = type('UploadForm', (forms.Form,), {'name': forms.CharField(), 'upload': forms.FileField()})
+    for size in args.upload_sizes:
+        upload = SimpleUploadedFile('upload.bin', b'x' * size)
+        hmac = hash_validated(form_class, {'name': 'Jane Doe'}, {'upload': upload})
+        for version in HASH_VERSIONS:
+            yield 'upload', '%d kB' % (size // 1024), version, lambda hmac=hmac, version=version: hmac(version)
+
+
+def run_round_trips(args):
+    form_class, data = get_form('char', args.preview_width)
+    previews = {
+        version: type('Preview', (BenchmarkPreview,), {'security_hash_version': version})(form_class)
+        for version in HASH_VERSIONS
+    }
+    urlconf = URLConf([path('preview%d/' % version, preview) for version, preview in previews.items()])
+    templates = [{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')],
+        'APP_DIRS': True,
+    }]
+    with override_settings(ROOT_URLCONF=urlconf, TEMPLATES=templates):
+        for version, preview in previews.items():
+            client = Client()
+            url = '/preview%d/' % version
+
+            def round_trip(preview=preview, client=client, url=url):
+                response = client.post(url, {**data, preview.stage_field: '1'})
+                hash_value = re.search(
+                    r'name="%s" value="([^"]+)"' % preview.hash_field, response.content.decode()).group(1)
+                response = client.post(url, {**data, preview.stage_field: '2', preview.hash_field: hash_value})
+                if response.status_code != HTTPStatus.OK or response.content != b'done':
+                    raise AssertionError('The round trip failed.')
+
+            yield 'round_trip', '%d fields' % args.preview_width, version, round_trip
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--widths', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Numbers of fields of the forms hashed.')
+    parser.add_argument('--type-width', type=int, default=50,
+                        help='Number of fields of the forms made of a single field type.')
+    parser.add_argument('--upload-sizes', type=int, nargs='+', default=[1024, 1024 ** 2, 10 * 1024 ** 2],
+                        help='Sizes of the uploaded files hashed, in bytes.')
+    parser.add_argument('--preview-width', type=int, default=10,
+                        help='Number of fields of the form previewed in the round trips.')
+    parser.add_argument('--number', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON.')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    django.setup()
+    results = []
+    start = time.perf_counter()
+    for benchmark in (run_widths, run_types, run_uploads, run_round_trips):
+        for name, case, version, func in benchmark(args):
+            us, peak_kb = measure(func, args.number)
+            results.append({'benchmark': name, 'case': case, 'version': version, 'us': us, 'peak_kb': peak_kb})
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key != 'json'}
+        print(json.dumps({'config': config, 'results': results}, indent=2))
+        return
+    print('%-12s %-16s %8s %12s %12s' % ('benchmark', 'case', 'version', 'time (us)', 'peak (kB)'))
+    for result in results:
+        print('%(benchmark)-12s %(case)-16s %(version)8d %(us)12.1f %(peak_kb)12.1f' % result)
+    print('Total: %.1fs' % (time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
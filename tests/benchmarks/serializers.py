@@ -0,0 +1,103 @@
+"""
+Compares the wizard storage serializers on realistic wizard data.
+
+Run it from the repository root with::
+
+    DJANGO_SETTINGS_MODULE=tests.settings python -m tests.benchmarks.serializers
+"""
+import argparse
+import json
+import timeit
+import zlib
+
+from formtools.wizard.storage.serializers import (
+    CompactJSONSerializer, JSONSerializer, MsgPackSerializer, msgpack,
+)
+
+
+def get_wizard_data(steps=20, formset_rows=50):
+    """
+    Returns data shaped like the data stored by a wizard with `steps` steps,
+    including a formset step with `formset_rows` rows and a few file uploads.
+    """
+    step_data = {}
+    step_files = {}
+    for i in range(steps):
+        step = 'step%d' % i
+        data = {
+            'contact_wizard-current_step': [step],
+            f'{step}-name': ['Jane Doe'],
+            f'{step}-email': ['jane@example.com'],
+            f'{step}-address': ['123 Main St'],
+            f'{step}-city': ['Djangoland'],
+            f'{step}-accept': ['on'],
+            f'{step}-tags': ['one', 'two', 'three'],
+        }
+        if i == 1:
+            data.update({
+                f'{step}-TOTAL_FORMS': [str(formset_rows)],
+                f'{step}-INITIAL_FORMS': ['0'],
+            })
+            for row in range(formset_rows):
+                data.update({
+                    f'{step}-{row}-product': [str(row)],
+                    f'{step}-{row}-quantity': ['1'],
+                    f'{step}-{row}-comment': ['Lorem ipsum dolor sit amet'],
+                })
+        step_data[step] = data
+        if i % 4 == 0:
+            step_files[step] = {
+                'upload': {
+                    'tmp_name': f'upload_{i}.pdf',
+                    'name': f'upload_{i}.pdf',
+                    'content_type': 'application/pdf',
+                    'size': 1024 * i,
+                    'charset': None,
+                },
+            }
+    return {
+        'step': 'step%d' % (steps - 1),
+        'step_data': step_data,
+        'step_files': step_files,
+        'extra_data': {},
+    }
+
+
+def run(serializers, data, number):
+    results = []
+    for serializer in serializers:
+        payload = serializer.dumps(data)
+        assert serializer.loads(payload) == data
+        results.append({
+            'serializer': serializer.__class__.__name__,
+            'size': len(payload),
+            'compressed_size': len(zlib.compress(payload)),
+            'dumps_us': timeit.timeit(lambda: serializer.dumps(data), number=number) / number * 1e6,
+            'loads_us': timeit.timeit(lambda: serializer.loads(payload), number=number) / number * 1e6,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--formset-rows', type=int, default=50)
+    parser.add_argument('--number', type=int, default=1000)
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON.')
+    args = parser.parse_args()
+
+    serializers = [JSONSerializer(), CompactJSONSerializer()]
+    if msgpack is not None:
+        serializers.append(MsgPackSerializer())
+    results = run(serializers, get_wizard_data(args.steps, args.formset_rows), args.number)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('%-22s %10s %12s %12s %12s' % ('serializer', 'size', 'compressed', 'dumps (us)', 'loads (us)'))
+    for result in results:
+        print('%(serializer)-22s %(size)10d %(compressed_size)12d %(dumps_us)12.1f %(loads_us)12.1f' % result)
+
+
+if __name__ == '__main__':
+    main()
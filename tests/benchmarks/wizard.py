@@ -0,0 +1,293 @@
+"""
+Drives wizards through complete flows and measures their requests.
+
+Run it from the repository root with::
+
+    python -m tests.benchmarks.wizard
+
+DJANGO_SETTINGS_MODULE defaults to ``tests.settings``.
+
+For every wizard view the requests per second, the p50/p99 latency, the number
+of queries and the peak memory are reported per request phase: ``start`` (the
+GET of the first step), ``step`` (posting a step, including following the
+redirect of named URL wizards) and ``done`` (posting the last step). The
+durations of the wizard phases measured by a ``WizardTimer`` are included.
+Use ``--json`` to get results suitable for comparing commits.
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from http import HTTPStatus
+
+import django
+from django import forms
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import path, re_path, reverse
+
+from formtools.wizard.timing import WizardTimer
+from formtools.wizard.views import (
+    CookieWizardView, NamedUrlSessionWizardView, SessionWizardView,
+    normalize_name,
+)
+
+WIZARD_CLASSES = [SessionWizardView, CookieWizardView, NamedUrlSessionWizardView]
+
+
+class URLConf:
+    def __init__(self, urlpatterns):
+        self.urlpatterns = urlpatterns
+
+
+class CollectingTimer(WizardTimer):
+    """
+    Sums up the wizard phases of all requests in the ``collected`` dictionary
+    of the class.
+    """
+    collected = None
+
+    def report(self, response):
+        for name, (count, seconds) in self.phases.items():
+            total_count, total_seconds = self.collected.get(name, (0, 0.0))
+            self.collected[name] = (total_count + count, total_seconds + seconds)
+
+
+def get_form_list(args, queryset):
+    class StepForm(forms.Form):
+        name = forms.CharField(max_length=100)
+        email = forms.EmailField()
+        number = forms.IntegerField()
+        user = forms.ModelChoiceField(queryset=queryset)
+        include = forms.BooleanField(required=False)
+
+    class FileStepForm(StepForm):
+        upload = forms.FileField()
+
+    class RowForm(forms.Form):
+        product = forms.IntegerField()
+        comment = forms.CharField()
+
+    form_list = []
+    for i in range(args.steps):
+        form_class = StepForm
+        if args.file_every and i % args.file_every == 1:
+            form_class = FileStepForm
+        elif args.formset_rows and i == 1:
+            form_class = forms.formset_factory(RowForm, extra=0)
+        form_list.append(('step%d' % i, form_class))
+    return form_list
+
+
+def get_condition_dict(args):
+    def condition(wizard):
+        return (wizard.get_cleaned_data_for_step('step0') or {}).get('include', True)
+
+    if not args.condition_every:
+        return {}
+    return {
+        'step%d' % i: condition
+        for i in range(1, args.steps) if i % args.condition_every == 0
+    }
+
+
+def get_step_data(args, prefix, step, form_class, user_pk):
+    data = {'%s-current_step' % prefix: step}
+    if issubclass(form_class, forms.BaseFormSet):
+        data.update({
+            f'{step}-TOTAL_FORMS': str(args.formset_rows),
+            f'{step}-INITIAL_FORMS': '0',
+        })
+        for row in range(args.formset_rows):
+            data.update({
+                f'{step}-{row}-product': str(row),
+                f'{step}-{row}-comment': 'Lorem ipsum dolor sit amet',
+            })
+        return data
+    data.update({
+        f'{step}-name': 'Jane Doe',
+        f'{step}-email': 'jane@example.com',
+        f'{step}-number': '42',
+        f'{step}-user': str(user_pk),
+        f'{step}-include': 'on',
+    })
+    if 'upload' in form_class.base_fields:
+        data[f'{step}-upload'] = SimpleUploadedFile('upload.bin', b'x' * args.file_size)
+    return data
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+class WizardBenchmark:
+    def __init__(self, wizard_class, args, file_storage, user_pk):
+        self.args = args
+        self.user_pk = user_pk
+        self.named = issubclass(wizard_class, NamedUrlSessionWizardView)
+        self.timer_phases = {}
+
+        def done(self, form_list, **kwargs):
+            return HttpResponse('done')
+
+        view_class = type('Benchmark%s' % wizard_class.__name__, (wizard_class,), {
+            'done': done,
+            'file_storage': file_storage,
+            'timer_class': type('Timer', (CollectingTimer,), {'collected': self.timer_phases}),
+        })
+        self.name = wizard_class.__name__
+        self.prefix = normalize_name(view_class.__name__)
+        self.form_list = get_form_list(args, apps.get_model('auth', 'User').objects.all())
+        initkwargs = {'condition_dict': get_condition_dict(args)}
+        if self.named:
+            initkwargs.update(url_name='bench_step', done_step_name='done')
+            view = view_class.as_view(self.form_list, **initkwargs)
+            self.urlconf = URLConf([
+                re_path(r'^bench/(?P<step>.+)/$', view, name='bench_step'),
+                path('bench/', view, name='bench_start'),
+            ])
+        else:
+            self.urlconf = URLConf([
+                path('bench/', view_class.as_view(self.form_list, **initkwargs), name='bench_start'),
+            ])
+
+    def get_requests(self, client):
+        """
+        Yields the phase and a callable doing the requests of a complete flow.
+        """
+        url = reverse('bench_start')
+        yield 'start', lambda: client.get(url, follow=self.named)
+        for step, form_class in self.form_list:
+            data = get_step_data(self.args, self.prefix, step, form_class, self.user_pk)
+            phase = 'done' if step == self.form_list[-1][0] else 'step'
+            if self.named:
+                # Includes the redirect to the next step.
+                step_url = reverse('bench_step', kwargs={'step': step})
+                yield phase, lambda step_url=step_url, data=data: client.post(step_url, data, follow=True)
+            else:
+                yield phase, lambda data=data: client.post(url, data)
+
+    def run_flow(self, client, record):
+        for phase, request in self.get_requests(client):
+            result = record(phase, request)
+            if result.status_code != HTTPStatus.OK or (phase == 'done' and result.content != b'done'):
+                raise AssertionError('%s %s failed: %d' % (self.name, phase, result.status_code))
+
+    def run(self):
+        latencies, queries = {}, {}
+        peak_memory = {}
+
+        def timed(phase, request):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = request()
+                latencies.setdefault(phase, []).append(time.perf_counter() - start)
+            queries.setdefault(phase, []).append(len(context))
+            return response
+
+        def traced(phase, request):
+            tracemalloc.reset_peak()
+            response = request()
+            peak_memory[phase] = max(peak_memory.get(phase, 0), tracemalloc.get_traced_memory()[1])
+            return response
+
+        with override_settings(ROOT_URLCONF=self.urlconf):
+            for _ in range(self.args.warmup):
+                self.run_flow(Client(), lambda phase, request: request())
+            self.timer_phases.clear()
+            for _ in range(self.args.flows):
+                self.run_flow(Client(), timed)
+            timer_phases = dict(self.timer_phases)
+            # Measure the memory separately, tracing slows down the requests.
+            tracemalloc.start()
+            try:
+                self.run_flow(Client(), traced)
+            finally:
+                tracemalloc.stop()
+
+        all_latencies = [latency for values in latencies.values() for latency in values]
+        return {
+            'wizard': self.name,
+            'requests': len(all_latencies),
+            'rps': len(all_latencies) / sum(all_latencies),
+            'p50_ms': percentile(all_latencies, 50) * 1000,
+            'p99_ms': percentile(all_latencies, 99) * 1000,
+            'phases': {
+                phase: {
+                    'requests': len(values),
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    'queries': sum(queries[phase]) / len(values),
+                    'peak_memory_kb': peak_memory[phase] / 1024,
+                }
+                for phase, values in latencies.items()
+            },
+            'wizard_phases_ms': {
+                name: {'count': count, 'total_ms': seconds * 1000}
+                for name, (count, seconds) in timer_phases.items()
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--steps', type=int, default=20, help='Number of steps (5-200).')
+    parser.add_argument('--formset-rows', type=int, default=10,
+                        help='Rows of the formset of the second step, 0 disables it.')
+    parser.add_argument('--condition-every', type=int, default=3,
+                        help='Make every n-th step conditional, 0 disables conditions.')
+    parser.add_argument('--file-every', type=int, default=5,
+                        help='Upload a file in every n-th step, 0 disables uploads.')
+    parser.add_argument('--file-size', type=int, default=64 * 1024)
+    parser.add_argument('--flows', type=int, default=10, help='Number of measured flows per wizard.')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON.')
+    args = parser.parse_args()
+    if not 5 <= args.steps <= 200:  # noqa: PLR2004
+        parser.error('--steps must be between 5 and 200.')
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    django.setup()
+    # Use an in-memory test database.
+    connection.creation.create_test_db(verbosity=0)
+    user_pk = apps.get_model('auth', 'User').objects.create(username='bench').pk
+    location = tempfile.mkdtemp()
+    try:
+        results = [
+            WizardBenchmark(wizard_class, args, FileSystemStorage(location=location), user_pk).run()
+            for wizard_class in WIZARD_CLASSES
+        ]
+    finally:
+        shutil.rmtree(location)
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key != 'json'}
+        print(json.dumps({'config': config, 'results': results}, indent=2))
+        return
+    print('%-26s %-6s %8s %9s %9s %9s %12s' % (
+        'wizard', 'phase', 'requests', 'p50 (ms)', 'p99 (ms)', 'queries', 'memory (kB)'))
+    for result in results:
+        print('%-26s %-6s %8d %9.2f %9.2f %9s %12s  (%.1f requests/s)' % (
+            result['wizard'], 'all', result['requests'], result['p50_ms'], result['p99_ms'], '', '',
+            result['rps']))
+        for phase, values in result['phases'].items():
+            print('%-26s %-6s %8d %9.2f %9.2f %9.1f %12.1f' % (
+                '', phase, values['requests'], values['p50_ms'], values['p99_ms'],
+                values['queries'], values['peak_memory_kb']))
+        print('%-26s %s' % ('', ', '.join(
+            '%s: %.1fms/%d' % (name, values['total_ms'], values['count'])
+            for name, values in result['wizard_phases_ms'].items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,26 @@
 import datetime
 import os
+import re
 import unittest
 import warnings
-from io import StringIO
+from io import BytesIO, StringIO
+from unittest import mock
 
-from django import http
+from asgiref.sync import iscoroutinefunction
+from django import forms, http
+from django.contrib.auth.models import User
 from django.core.files.uploadedfile import (
     InMemoryUploadedFile, TemporaryUploadedFile,
 )
-from django.test import TestCase, override_settings
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.crypto import salted_hmac
 
 from formtools import preview, utils
 
 from .forms import (
     HashTestBlankForm, HashTestForm, HashTestFormWithFile, TestForm,
 )
+from .wizard.wizardtests.models import Poem, Poet
 
 success_string = "Done was called!"
 success_string_encoded = success_string.encode()
@@ -36,6 +42,22 @@ class TestFormPreview(preview.FormPreview):
         return http.HttpResponse(success_string)
 
 
+class TestAsyncFormPreview(preview.AsyncFormPreview):
+    async def parse_params(self, request, *args, **kwargs):
+        self.state['user'] = request.user
+
+    def get_context(self, request, form):
+        context = super().get_context(request, form)
+        context.update({'custom_context': True})
+        return context
+
+    def get_initial(self, request):
+        return {'field1': 'Works!'}
+
+    async def done(self, request, cleaned_data):
+        return http.HttpResponse(success_string)
+
+
 @override_settings(
     TEMPLATES=[{
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -45,6 +67,7 @@ class TestFormPreview(preview.FormPreview):
     ROOT_URLCONF='tests.urls',
 )
 class PreviewTests(TestCase):
+    url = '/preview/'
 
     def setUp(self):
         super().setUp()
@@ -58,7 +81,7 @@ class PreviewTests(TestCase):
         """
         FormPreview.parse_params takes a request object as the first argument.
         """
-        response = self.client.get('/preview/')
+        response = self.client.get(self.url)
         state = response.context['state']
         self.assertIsNotNone(state.get('user') is not None)
 
@@ -68,6 +91,21 @@ class PreviewTests(TestCase):
         """
         self.assertEqual(self.preview.unused_name('field1'), 'field1__')
 
+    def test_hidden_field_names(self):
+        class StageForm(forms.Form):
+            stage = forms.CharField()
+            stage_ = forms.CharField()
+            hash = forms.CharField()
+
+        self.assertEqual(self.preview.stage_field, 'stage')
+        self.assertEqual(self.preview.hash_field, 'hash')
+        form_preview = preview.FormPreview(StageForm)
+        self.assertEqual(form_preview.stage_field, 'stage__')
+        self.assertEqual(form_preview.hash_field, 'hash_')
+        with mock.patch.object(form_preview, 'unused_name') as unused_name:
+            form_preview.get_context(None, None)
+        unused_name.assert_not_called()
+
     def test_form_get(self):
         """
         Test formtools.preview form retrieval.
@@ -78,7 +116,7 @@ class PreviewTests(TestCase):
         is created to manage the stage.
 
         """
-        response = self.client.get('/preview/')
+        response = self.client.get(self.url)
         stage = self.input % 1
         self.assertContains(response, stage, 1)
         self.assertEqual(response.context['custom_context'], True)
@@ -96,7 +134,7 @@ class PreviewTests(TestCase):
         # Pass strings for form submittal and add stage variable to
         # show we previously saw first stage of the form.
         self.test_data.update({'stage': 1, 'date1': datetime.date(2006, 10, 25)})
-        response = self.client.post('/preview/', self.test_data)
+        response = self.client.post(self.url, self.test_data)
         # Check to confirm stage is set to 2 in output form.
         stage = self.input % 2
         self.assertContains(response, stage, 1)
@@ -114,11 +152,11 @@ class PreviewTests(TestCase):
         # Pass strings for form submittal and add stage variable to
         # show we previously saw first stage of the form.
         self.test_data.update({'stage': 2, 'date1': datetime.date(2006, 10, 25)})
-        response = self.client.post('/preview/', self.test_data)
+        response = self.client.post(self.url, self.test_data)
         self.assertNotEqual(response.content, success_string_encoded)
         hash = self.preview.security_hash(None, TestForm(self.test_data))
         self.test_data.update({'hash': hash})
-        response = self.client.post('/preview/', self.test_data)
+        response = self.client.post(self.url, self.test_data)
         self.assertEqual(response.content, success_string_encoded)
 
     def test_bool_submit(self):
@@ -138,7 +176,7 @@ class PreviewTests(TestCase):
         hash = self.preview.security_hash(None, TestForm(self.test_data))
         self.test_data.update({'hash': hash, 'bool1': 'False'})
         with warnings.catch_warnings(record=True):
-            response = self.client.post('/preview/', self.test_data)
+            response = self.client.post(self.url, self.test_data)
             self.assertEqual(response.content, success_string_encoded)
 
     def test_form_submit_good_hash(self):
@@ -149,11 +187,11 @@ class PreviewTests(TestCase):
         # Pass strings for form submittal and add stage variable to
         # show we previously saw first stage of the form.
         self.test_data.update({'stage': 2})
-        response = self.client.post('/preview/', self.test_data)
+        response = self.client.post(self.url, self.test_data)
         self.assertNotEqual(response.content, success_string_encoded)
         hash = utils.form_hmac(TestForm(self.test_data))
         self.test_data.update({'hash': hash})
-        response = self.client.post('/preview/', self.test_data)
+        response = self.client.post(self.url, self.test_data)
         self.assertEqual(response.content, success_string_encoded)
 
     def test_form_submit_bad_hash(self):
@@ -164,7 +202,7 @@ class PreviewTests(TestCase):
         # Pass strings for form submittal and add stage variable to
         # show we previously saw first stage of the form.
         self.test_data.update({'stage': 2})
-        response = self.client.post('/preview/', self.test_data)
+        response = self.client.post(self.url, self.test_data)
         self.assertEqual(response.status_code, 200)
         self.assertNotEqual(response.content, success_string_encoded)
         hash = utils.form_hmac(TestForm(self.test_data)) + "bad"
@@ -172,6 +210,81 @@ class PreviewTests(TestCase):
         response = self.client.post('/previewpreview/', self.test_data)
         self.assertNotEqual(response.content, success_string_encoded)
 
+    def test_security_hash_version(self):
+        """
+        The configured version is used for new hashes, hashes of the other
+        versions are accepted too.
+        """
+        self.test_data.update({'stage': 2})
+        preview_v2 = preview.FormPreview(TestForm)
+        preview_v2.security_hash_version = 2
+        hash_v1 = self.preview.security_hash(None, TestForm(self.test_data))
+        hash_v2 = preview_v2.security_hash(None, TestForm(self.test_data))
+        self.assertTrue(hash_v2.startswith('2$'))
+        self.assertNotEqual(hash_v1, hash_v2)
+        self.assertEqual(self.preview.security_hash(None, TestForm(self.test_data), version=2), hash_v2)
+
+        for token in (hash_v1, hash_v2):
+            for instance in (self.preview, preview_v2):
+                self.assertTrue(instance._check_security_hash(token, None, TestForm(self.test_data)))
+        for token in ('', '3$' + hash_v2[2:], 'x$' + hash_v2[2:], hash_v2[:-1]):
+            self.assertFalse(preview_v2._check_security_hash(token, None, TestForm(self.test_data)))
+
+        self.test_data.update({'hash': hash_v2})
+        response = self.client.post(self.url, self.test_data)
+        self.assertEqual(response.content, success_string_encoded)
+
+    def test_process_preview_related_objects(self):
+        class PoemForm(forms.Form):
+            poem = forms.ModelChoiceField(queryset=Poem.objects.all())
+
+        class PoemPreview(preview.FormPreview):
+            def process_preview(self, request, form, context):
+                context['poet'] = form.cleaned_data['poem'].poet
+
+            def done(self, request, cleaned_data):
+                return http.HttpResponse(success_string)
+
+        poem = Poem.objects.create(poet=Poet.objects.create(name='Poet'), name='Poem')
+        form_preview = PoemPreview(PoemForm)
+        for version in utils.HASH_VERSIONS:
+            form_preview.security_hash_version = version
+            response = form_preview(RequestFactory().post('/', {'poem': poem.pk, 'stage': 1}))
+            hash_value = re.search(r'name="hash" value="([^"]+)"', response.content.decode()).group(1)
+            response = form_preview(RequestFactory().post('/', {'poem': poem.pk, 'stage': 2, 'hash': hash_value}))
+            self.assertEqual(response.content, success_string_encoded)
+
+    def test_security_hash_without_version(self):
+        """
+        Overrides of security_hash() without the version argument only accept
+        hashes of the configured version.
+        """
+        class IPPreview(preview.FormPreview):
+            def security_hash(self, request, form):
+                return utils.form_hmac(form) + request.META['REMOTE_ADDR']
+
+            def done(self, request, cleaned_data):
+                return http.HttpResponse(success_string)
+
+        form_preview = IPPreview(TestForm)
+        request = RequestFactory().post('/', self.test_data)
+        hash_value = form_preview.security_hash(request, TestForm(self.test_data))
+        self.assertTrue(form_preview._check_security_hash(hash_value, request, TestForm(self.test_data)))
+        self.assertFalse(form_preview._check_security_hash('2$x', request, TestForm(self.test_data)))
+
+        request = RequestFactory().post('/', {**self.test_data, 'stage': 2, 'hash': '2$x'})
+        response = form_preview(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.content, success_string_encoded)
+
+
+class AsyncPreviewTests(PreviewTests):
+    url = '/async_preview/'
+
+    def test_async_view(self):
+        self.assertTrue(iscoroutinefunction(TestAsyncFormPreview(TestForm)))
+        self.assertFalse(iscoroutinefunction(TestFormPreview(TestForm)))
+
 
 class FormHmacTests(unittest.TestCase):
 
@@ -214,3 +327,128 @@ class FormHmacTests(unittest.TestCase):
             hash1 = utils.form_hmac(f1)
             hash2 = utils.form_hmac(f2)
         self.assertNotEqual(hash1, hash2)
+
+    def test_hash_with_file_content(self):
+        with TemporaryUploadedFile('test', 'text/plain', 3, 'utf8') as temporary_file:
+            temporary_file.write(b'abc')
+            with InMemoryUploadedFile(BytesIO(b'abc'), '', 'test', 'text/plain', 3, 'utf8') as memory_file:
+                hash1 = utils.form_hmac(
+                    HashTestFormWithFile({'name': 'joe'}, files={'attachment': temporary_file}), version=2)
+                hash2 = utils.form_hmac(
+                    HashTestFormWithFile({'name': 'joe'}, files={'attachment': memory_file}), version=2)
+        # Only the content of the files is hashed.
+        self.assertEqual(hash1, hash2)
+
+        with InMemoryUploadedFile(BytesIO(b'abd'), '', 'test', 'text/plain', 3, 'utf8') as memory_file:
+            hash3 = utils.form_hmac(
+                HashTestFormWithFile({'name': 'joe'}, files={'attachment': memory_file}), version=2)
+        self.assertNotEqual(hash1, hash3)
+
+    def test_hash_with_file_reads_chunks(self):
+        with TemporaryUploadedFile('test', 'text/plain', 3, 'utf8') as some_file:
+            some_file.write(b'abc')
+            some_file.DEFAULT_CHUNK_SIZE = 2
+            with mock.patch.object(some_file.file, 'read', wraps=some_file.file.read) as read:
+                utils.form_hmac(HashTestFormWithFile({'name': 'joe'}, files={'attachment': some_file}), version=2)
+        self.assertEqual([call.args for call in read.call_args_list], [(2,), (2,), (2,)])
+
+    def test_legacy_hash(self):
+        # Version 1 hashes don't change, so that the forms being previewed
+        # while upgrading still validate.
+        data = {'field1': 'foo', 'field1_': 'asdf'}
+        self.assertEqual(utils.form_hmac(TestForm(data)), 'a3e7f0e9f11be6d6d0adb17c5c8a4c72dda9dab8')
+        with TemporaryUploadedFile('test', 'text/plain', 3, 'utf8') as some_file:
+            some_file.write(b'abc')
+            some_file.seek(0)
+            hash1 = utils.form_hmac(HashTestFormWithFile({'name': 'joe'}, files={'attachment': some_file}))
+        self.assertEqual(hash1, '426721ba97bdb680376b3b5e1ad356c9912c684c')
+
+    def test_canonical_hash(self):
+        f1 = HashTestForm({'name': 'joe', 'bio': 'Speaking español.'})
+        f2 = HashTestForm({'name': '  joe', 'bio': 'Speaking español.  '})
+        hash1 = utils.form_hmac(f1, version=2)
+        self.assertEqual(hash1, utils.form_hmac(f2, version=2))
+        # Values are length-prefixed, so they can't run into each other.
+        expected = salted_hmac(
+            'formtools.utils.form_hmac.2',
+            'k4:names3:joek3:bios18:Speaking español.'.encode(),
+        ).hexdigest()
+        self.assertEqual(hash1, '2$' + expected)
+        f3 = HashTestForm({'name': 'joeS', 'bio': 'peaking español.'})
+        self.assertNotEqual(hash1, utils.form_hmac(f3, version=2))
+
+    def test_canonical_hash_values(self):
+        class ValuesForm(forms.Form):
+            flag = forms.BooleanField(required=False)
+            number = forms.DecimalField()
+            date = forms.DateField()
+            choices = forms.MultipleChoiceField(choices=[('a', 'A'), ('b', 'B')])
+
+        data = {'flag': 'on', 'number': '1.50', 'date': '2006-10-25', 'choices': ['a', 'b']}
+        hash1 = utils.form_hmac(ValuesForm(data), version=2)
+        self.assertEqual(hash1, utils.form_hmac(ValuesForm(data), version=2))
+        # The size of the blocks passed to the HMAC doesn't change the hash.
+        with mock.patch.object(utils, 'HASH_BLOCK_SIZE', 1):
+            self.assertEqual(hash1, utils.form_hmac(ValuesForm(data), version=2))
+        for key, value in (('flag', ''), ('number', '1.51'), ('date', '2006-10-26'), ('choices', ['a'])):
+            self.assertNotEqual(hash1, utils.form_hmac(ValuesForm({**data, key: value}), version=2))
+
+        with self.assertRaises(ValueError):
+            utils.form_hmac(ValuesForm(data), version=3)
+
+    def test_hash_version(self):
+        self.assertEqual(utils.get_hash_version('abc123'), 1)
+        self.assertEqual(utils.get_hash_version('2$abc123'), 2)
+        self.assertIsNone(utils.get_hash_version('3$abc123'))
+        self.assertIsNone(utils.get_hash_version('$abc123'))
+
+
+class FormHmacQueryTests(TestCase):
+    class UserForm(forms.Form):
+        name = forms.CharField()
+        user = forms.ModelChoiceField(queryset=User.objects.all())
+        users = forms.ModelMultipleChoiceField(queryset=User.objects.all())
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username='user%d' % i) for i in range(3)]
+
+    def setUp(self):
+        self.data = {
+            'name': ' joe ',
+            'user': self.users[0].pk,
+            'users': [self.users[1].pk, self.users[2].pk],
+        }
+
+    def test_validated_form(self):
+        # Version 1 pickles the values, the model fields are cleaned again so
+        # that the caches of the cleaned instances don't affect the hash.
+        for version, queries in ((1, 2), (2, 0)):
+            expected = utils.form_hmac(self.UserForm(self.data), version=version)
+            form = self.UserForm(self.data)
+            self.assertTrue(form.is_valid())
+            with self.assertNumQueries(queries):
+                self.assertEqual(utils.form_hmac(form, version=version), expected)
+
+    def test_invalid_form(self):
+        form = self.UserForm({**self.data, 'name': ''})
+        self.assertFalse(form.is_valid())
+        with self.assertRaises(forms.ValidationError):
+            utils.form_hmac(form)
+
+    def test_custom_clean(self):
+        class CleanForm(self.UserForm):
+            def clean(self):
+                cleaned_data = super().clean()
+                cleaned_data['user'] = None
+                return cleaned_data
+
+        class CleanFieldForm(self.UserForm):
+            def clean_user(self):
+                return None
+
+        expected = utils.form_hmac(self.UserForm(self.data))
+        for form_class in (CleanForm, CleanFieldForm):
+            form = form_class(self.data)
+            self.assertTrue(form.is_valid())
+            self.assertEqual(utils.form_hmac(form), expected)
@@ -5,8 +5,9 @@ This is a URLconf to be loaded by tests.py. Add any URLs needed for tests only.
 from django.urls import path
 
 from .forms import TestForm
-from .tests import TestFormPreview
+from .tests import TestAsyncFormPreview, TestFormPreview
 
 urlpatterns = [
     path('preview/', TestFormPreview(TestForm)),
+    path('async_preview/', TestAsyncFormPreview(TestForm)),
 ]
@@ -33,6 +33,12 @@ class NamedWizardTests:
         for file in temp_storage.listdir('')[1]:
             temp_storage.delete(file)
 
+    def get_tmp_file_name(self):
+        # The temporary file is named after a digest of its content.
+        tmp_names = temp_storage.listdir('')[1]
+        self.assertEqual(len(tmp_names), 1)
+        return tmp_names[0]
+
     def test_initial_call(self):
         response = self.client.get(reverse('%s_start' % self.wizard_urlname))
         self.assertEqual(response.status_code, 302)
@@ -149,7 +155,7 @@ class NamedWizardTests:
         self.assertEqual(response.context['wizard']['steps'].current, 'form3')
 
         # Check that the file got uploaded properly.
-        with open(__file__, 'rb') as f, temp_storage.open(UPLOADED_FILE_NAME) as f2:
+        with open(__file__, 'rb') as f, temp_storage.open(self.get_tmp_file_name()) as f2:
             self.assertEqual(f.read(), f2.read())
 
         response = self.client.post(
@@ -169,7 +175,7 @@ class NamedWizardTests:
         self.assertEqual(response.status_code, 200)
 
         # After the wizard is done no files should exist anymore.
-        self.assertFalse(temp_storage.exists(UPLOADED_FILE_NAME))
+        self.assertEqual(temp_storage.listdir('')[1], [])
 
         all_data = response.context['form_list']
         del all_data[1]['file1']
@@ -200,13 +206,13 @@ class NamedWizardTests:
                 post_data)
         response = self.client.get(response.url)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(temp_storage.exists(UPLOADED_FILE_NAME))
+        self.get_tmp_file_name()
 
         step2_url = reverse(self.wizard_urlname, kwargs={'step': 'form2'})
         response = self.client.get(step2_url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context['wizard']['steps'].current, 'form2')
-        with open(__file__, 'rb') as f, temp_storage.open(UPLOADED_FILE_NAME) as f2:
+        with open(__file__, 'rb') as f, temp_storage.open(self.get_tmp_file_name()) as f2:
             self.assertEqual(f.read(), f2.read())
 
         response = self.client.post(
@@ -226,7 +232,7 @@ class NamedWizardTests:
         all_data = response.context['all_cleaned_data']
         self.assertEqual(all_data['file1'].name, UPLOADED_FILE_NAME)
         self.assertTrue(all_data['file1'].closed)
-        self.assertFalse(temp_storage.exists(UPLOADED_FILE_NAME))
+        self.assertEqual(temp_storage.listdir('')[1], [])
         del all_data['file1']
         self.assertEqual(
             all_data,
@@ -364,6 +370,38 @@ class NamedCookieWizardTests(NamedWizardTests, TestCase):
     )
 
 
+@override_settings(ROOT_URLCONF='tests.wizard.namedwizardtests.urls')
+class NamedAsyncSessionWizardTests(NamedWizardTests, TestCase):
+    wizard_urlname = 'nwiz_async_session'
+    wizard_step_1_data = {
+        'async_session_contact_wizard-current_step': 'form1',
+    }
+    wizard_step_data = (
+        {
+            'form1-name': 'Pony',
+            'form1-thirsty': '2',
+            'async_session_contact_wizard-current_step': 'form1',
+        },
+        {
+            'form2-address1': '123 Main St',
+            'form2-address2': 'Djangoland',
+            'async_session_contact_wizard-current_step': 'form2',
+        },
+        {
+            'form3-random_crap': 'blah blah',
+            'async_session_contact_wizard-current_step': 'form3',
+        },
+        {
+            'form4-INITIAL_FORMS': '0',
+            'form4-TOTAL_FORMS': '2',
+            'form4-MAX_NUM_FORMS': '0',
+            'form4-0-random_crap': 'blah blah',
+            'form4-1-random_crap': 'blah blah',
+            'async_session_contact_wizard-current_step': 'form4',
+        }
+    )
+
+
 class NamedFormTests:
 
     def test_revalidation(self):
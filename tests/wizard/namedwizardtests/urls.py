@@ -1,7 +1,8 @@
 from django.urls import path, re_path
 
 from .forms import (
-    CookieContactWizard, Page1, Page2, Page3, Page4, SessionContactWizard,
+    AsyncSessionContactWizard, CookieContactWizard, Page1, Page2, Page3, Page4,
+    SessionContactWizard,
 )
 
 
@@ -21,9 +22,19 @@ def get_named_cookie_wizard():
     )
 
 
+def get_named_async_session_wizard():
+    return AsyncSessionContactWizard.as_view(
+        [('form1', Page1), ('form2', Page2), ('form3', Page3), ('form4', Page4)],
+        url_name='nwiz_async_session',
+        done_step_name='nwiz_async_session_done'
+    )
+
+
 urlpatterns = [
     re_path(r'^nwiz_session/(?P<step>.+)/$', get_named_session_wizard(), name='nwiz_session'),
     path('nwiz_session/', get_named_session_wizard(), name='nwiz_session_start'),
     re_path(r'nwiz_cookie/(?P<step>.+)/$', get_named_cookie_wizard(), name='nwiz_cookie'),
     path('nwiz_cookie/', get_named_cookie_wizard(), name='nwiz_cookie_start'),
+    re_path(r'^nwiz_async_session/(?P<step>.+)/$', get_named_async_session_wizard(), name='nwiz_async_session'),
+    path('nwiz_async_session/', get_named_async_session_wizard(), name='nwiz_async_session_start'),
 ]
@@ -1,13 +1,20 @@
 import os
 import tempfile
-from datetime import datetime
+from datetime import datetime, timedelta
 from importlib import import_module
+from io import StringIO
+from unittest import mock
 
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.storage import FileSystemStorage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+from formtools.models import WizardFile
 
 temp_storage_location = tempfile.mkdtemp(dir=os.environ.get('DJANGO_TEST_TEMP_DIR'))
 temp_storage = FileSystemStorage(location=temp_storage_location)
@@ -100,11 +107,172 @@ class TestStorage:
         file_ = SimpleUploadedFile('file.txt', b'content')
         storage.set_step_files(step, {'file': file_})
 
-        with storage.get_step_files(step)['file'] as file:
-            tmp_name = file.name
+        tmp_name = storage.data[storage.step_files_key][step]['file']['tmp_name']
 
         self.assertTrue(storage.file_storage.exists(tmp_name))
 
         storage.reset()
         storage.update_response(HttpResponse())
         self.assertFalse(storage.file_storage.exists(tmp_name))
+
+    def test_async_files(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, temp_storage)
+        async_to_sync(storage.aload)()
+
+        step = 'start'
+        file_ = SimpleUploadedFile('file.txt', b'content')
+        async_to_sync(storage.aset_step_files)(step, {'file': file_})
+
+        with async_to_sync(storage.aget_step_files)(step)['file'] as file:
+            self.assertEqual(file.read(), b'content')
+        tmp_name = storage.data[storage.step_files_key][step]['file']['tmp_name']
+        self.assertTrue(storage.file_storage.exists(tmp_name))
+
+        storage.reset()
+        async_to_sync(storage.asave)(HttpResponse())
+        self.assertFalse(storage.file_storage.exists(tmp_name))
+
+    def get_tmp_name(self, storage, step, field):
+        return storage.data[storage.step_files_key][step][field]['tmp_name']
+
+    def test_deduplicate_files(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, temp_storage)
+
+        storage.set_step_files('start', {'file': SimpleUploadedFile('file.txt', b'content')})
+        tmp_name = self.get_tmp_name(storage, 'start', 'file')
+        self.assertTrue(tmp_name.endswith('.txt'))
+
+        # Submitting the same content again reuses the file.
+        with mock.patch.object(temp_storage, 'save') as save:
+            storage.set_step_files('start', {'file': SimpleUploadedFile('file.txt', b'content')})
+        save.assert_not_called()
+        self.assertEqual(self.get_tmp_name(storage, 'start', 'file'), tmp_name)
+
+        # Other steps and wizard runs don't share files.
+        storage.set_step_files('other', {'file': SimpleUploadedFile('file.txt', b'content')})
+        self.assertNotEqual(self.get_tmp_name(storage, 'other', 'file'), tmp_name)
+        storage2 = self.get_storage()('wizard2', request, temp_storage)
+        storage2.set_step_files('start', {'file': SimpleUploadedFile('file.txt', b'content')})
+        self.assertNotEqual(self.get_tmp_name(storage2, 'start', 'file'), tmp_name)
+
+        storage.reset()
+        storage2.reset()
+        storage.update_response(HttpResponse())
+        storage2.update_response(HttpResponse())
+        self.assertFalse(temp_storage.exists(tmp_name))
+
+    def test_superseded_files_deleted(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, temp_storage)
+
+        storage.set_step_files('start', {
+            'file1': SimpleUploadedFile('file.txt', b'content'),
+            'file2': SimpleUploadedFile('file.txt', b'content'),
+        })
+        tmp_name = self.get_tmp_name(storage, 'start', 'file1')
+        self.assertEqual(self.get_tmp_name(storage, 'start', 'file2'), tmp_name)
+
+        # The file is still used by file2.
+        storage.set_step_files('start', {'file1': SimpleUploadedFile('file.txt', b'new')})
+        storage.update_response(HttpResponse())
+        self.assertTrue(temp_storage.exists(tmp_name))
+
+        storage.set_step_files('start', {'file2': SimpleUploadedFile('file.txt', b'new')})
+        storage.update_response(HttpResponse())
+        self.assertFalse(temp_storage.exists(tmp_name))
+        new_tmp_name = self.get_tmp_name(storage, 'start', 'file1')
+        self.assertEqual(self.get_tmp_name(storage, 'start', 'file2'), new_tmp_name)
+        self.assertTrue(temp_storage.exists(new_tmp_name))
+
+        storage.reset()
+        storage.update_response(HttpResponse())
+        self.assertFalse(temp_storage.exists(new_tmp_name))
+
+    def test_lazy_files(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, temp_storage)
+        storage.set_step_files('start', {
+            'file1': SimpleUploadedFile('file1.txt', b'content1'),
+            'file2': SimpleUploadedFile('file2.txt', b'content2'),
+        })
+
+        with mock.patch.object(temp_storage, 'open', wraps=temp_storage.open) as open_:
+            files = storage.get_step_files('start')
+            self.assertEqual((files['file1'].name, files['file1'].size), ('file1.txt', 8))
+            self.assertTrue(files['file1'].closed)
+            open_.assert_not_called()
+
+            self.assertEqual(files['file1'].read(), b'content1')
+            self.assertFalse(files['file1'].closed)
+            self.assertEqual(open_.call_count, 1)
+
+            storage.reset()
+            storage.update_response(HttpResponse())
+            self.assertTrue(files['file1'].closed)
+            self.assertEqual(open_.call_count, 1)
+
+    def test_track_files(self):
+        storage_class = type('TrackingStorage', (self.get_storage(),), {'track_files': True})
+        request = get_request()
+        storage = storage_class('wizard1', request, temp_storage)
+
+        storage.set_step_files('start', {'file': SimpleUploadedFile('file.txt', b'content')})
+        tmp_name = self.get_tmp_name(storage, 'start', 'file')
+        wizard_file = WizardFile.objects.get()
+        self.assertEqual(wizard_file.name, tmp_name)
+        self.assertEqual(wizard_file.get_storage().location, temp_storage.location)
+
+        # Reused files aren't registered again.
+        storage.set_step_files('start', {'file': SimpleUploadedFile('file.txt', b'content')})
+        self.assertEqual(WizardFile.objects.count(), 1)
+
+        storage.set_step_files('start', {'file': SimpleUploadedFile('file.txt', b'new')})
+        storage.update_response(HttpResponse())
+        self.assertEqual(
+            list(WizardFile.objects.values_list('name', flat=True)),
+            [self.get_tmp_name(storage, 'start', 'file')],
+        )
+
+        storage.reset()
+        storage.update_response(HttpResponse())
+        self.assertFalse(WizardFile.objects.exists())
+
+    def test_reused_file_not_cleared(self):
+        storage_class = type('TrackingStorage', (self.get_storage(),), {'track_files': True})
+        request = get_request()
+        storage = storage_class('wizard1', request, temp_storage)
+        storage.set_step_files('step0', {'file': SimpleUploadedFile('file.txt', b'content')})
+        storage.set_step_files('step1', {'file': SimpleUploadedFile('file.txt', b'content')})
+        tmp_names = [self.get_tmp_name(storage, 'step%d' % i, 'file') for i in range(2)]
+        WizardFile.objects.update(created=timezone.now() - timedelta(days=1))
+
+        # Submitting the same file again marks the reused file as created now.
+        storage.set_step_files('step0', {'file': SimpleUploadedFile('file.txt', b'content')})
+        async_to_sync(storage.aset_step_files)('step1', {'file': SimpleUploadedFile('file.txt', b'content')})
+        call_command('clearwizardfiles', max_age=3600, stdout=StringIO())
+        self.assertEqual([temp_storage.exists(name) for name in tmp_names], [True, True])
+        self.assertEqual(WizardFile.objects.count(), 2)
+
+        storage.reset()
+        storage.update_response(HttpResponse())
+
+    def test_clear_wizard_files(self):
+        storage_class = type('TrackingStorage', (self.get_storage(),), {'track_files': True})
+        request = get_request()
+        storage = storage_class('wizard1', request, temp_storage)
+        for i in range(3):
+            storage.set_step_files('step%d' % i, {'file': SimpleUploadedFile('file.txt', b'content')})
+        tmp_names = [self.get_tmp_name(storage, 'step%d' % i, 'file') for i in range(3)]
+        WizardFile.objects.filter(name__in=tmp_names[:2]).update(
+            created=timezone.now() - timedelta(days=1))
+
+        stdout = StringIO()
+        call_command('clearwizardfiles', max_age=3600, batch_size=1, stdout=stdout)
+        self.assertEqual(stdout.getvalue(), 'Deleted 2 expired wizard file(s).\n')
+        self.assertEqual([temp_storage.exists(name) for name in tmp_names], [False, False, True])
+        self.assertEqual(list(WizardFile.objects.values_list('name', flat=True)), tmp_names[2:])
+
+        storage.reset()
+        storage.update_response(HttpResponse())
@@ -0,0 +1,203 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import TestCase
+
+from formtools.wizard.storage.cache import CacheStorage
+
+from .storage import TestStorage, get_request
+
+
+class TestCacheStorage(TestStorage, TestCase):
+    def get_storage(self):
+        return CacheStorage
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_persistence(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, None)
+        storage.current_step = 'start'
+        storage.set_step_data('start', {'field1': ['data1']})
+        response = HttpResponse()
+        storage.update_response(response)
+        self.assertEqual(cache.get(storage.get_cache_key()), {
+            'step': 'start', 'extra_data': {}, 'steps': ['start'], 'refreshed': mock.ANY,
+        })
+        self.assertEqual(cache.get(storage.get_cache_key('start')), ({'field1': ['data1']}, None))
+        token = response.cookies[storage.prefix].value
+
+        request = get_request()
+        request.COOKIES[storage.prefix] = token
+        storage2 = self.get_storage()('wizard1', request, None)
+        self.assertEqual(storage2.token, storage.token)
+        self.assertEqual(storage2.current_step, 'start')
+        self.assertEqual(storage2.get_step_data('start'), {'field1': ['data1']})
+
+        # The cookie is only set once and unchanged data isn't saved again.
+        cache.delete(storage.get_cache_key())
+        response = HttpResponse()
+        storage2.update_response(response)
+        self.assertEqual(len(response.cookies), 0)
+        self.assertIsNone(cache.get(storage.get_cache_key()))
+
+    def test_async_persistence(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, None)
+        async_to_sync(storage.aload)()
+        storage.current_step = 'start'
+        storage.set_step_data('start', {'field1': ['data1']})
+        response = HttpResponse()
+        async_to_sync(storage.asave)(response)
+        self.assertEqual(cache.get(storage.get_cache_key('start')), ({'field1': ['data1']}, None))
+
+        request = get_request()
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+        storage = self.get_storage()('wizard1', request, None)
+        backend = caches['default']
+        with mock.patch.object(backend, 'aget_many', wraps=backend.aget_many) as aget_many, \
+                mock.patch.object(backend, 'get_many') as get_many:
+            async_to_sync(storage.aload)()
+            # All steps are loaded up front.
+            self.assertEqual(storage.get_step_data('start'), {'field1': ['data1']})
+        aget_many.assert_called_once_with({storage.get_cache_key('start'): 'start'})
+        get_many.assert_not_called()
+        self.assertEqual(storage.current_step, 'start')
+
+    def test_lazy_steps(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, None)
+        storage.current_step = 'step2'
+        storage.set_step_data('start', {'field1': ['data1']})
+        storage.set_step_data('step2', {'field1': ['data2']})
+        response = HttpResponse()
+        storage.update_response(response)
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+
+        # The data is fetched on first access, steps only when accessed.
+        backend = caches['default']
+        with mock.patch.object(backend, 'get', wraps=backend.get) as get:
+            storage = self.get_storage()('wizard1', request, None)
+            get.assert_not_called()
+            self.assertEqual(storage.current_step, 'step2')
+        get.assert_called_once_with(storage.get_cache_key())
+        with mock.patch.object(backend, 'get_many', wraps=backend.get_many) as get_many:
+            self.assertEqual(storage.get_step_data('step2'), {'field1': ['data2']})
+            self.assertEqual(storage.get_step_data('step2'), {'field1': ['data2']})
+            self.assertIsNone(storage.get_step_files('step2'))
+        get_many.assert_called_once_with({storage.get_cache_key('step2'): 'step2'})
+        self.assertEqual(storage.data['step_data'], {'step2': {'field1': ['data2']}})
+
+        # Only changed steps are written back.
+        storage.set_step_data('step2', {'field1': ['data2']})
+        storage.set_step_data('start', {'field1': ['changed']})
+        self.assertEqual(storage._dirty_steps, {'start'})
+        self.assertFalse(storage.modified)
+        storage.update_response(HttpResponse())
+        storage = self.get_storage()('wizard1', request, None)
+        self.assertEqual(storage.get_step_data('start'), {'field1': ['changed']})
+
+        # Resetting removes the keys of all steps.
+        start_key = storage.get_cache_key('start')
+        step2_key = storage.get_cache_key('step2')
+        storage.reset()
+        storage.set_step_data('step3', {'field1': ['data3']})
+        storage.update_response(HttpResponse())
+        self.assertEqual(storage.get_cache_key('step3'), start_key)
+        self.assertEqual(cache.get(start_key), ({'field1': ['data3']}, None))
+        self.assertIsNone(cache.get(step2_key))
+        self.assertEqual(self.get_storage()('wizard1', request, None).data['steps'], ['step3'])
+
+    def test_timeout_refreshed(self):
+        class ShortLivedCacheStorage(CacheStorage):
+            timeout = 10
+
+        request = get_request()
+        with mock.patch('time.time', return_value=1000):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            storage.current_step = 'start'
+            storage.set_step_data('start', {'field1': ['data1']})
+            response = HttpResponse()
+            storage.update_response(response)
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+
+        # Writing the wizard data after half of the timeout refreshes the keys
+        # of the unchanged steps.
+        with mock.patch('time.time', return_value=1008):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            storage.current_step = 'step2'
+            storage.set_step_data('step2', {'field1': ['data2']})
+            async_to_sync(storage.asave)(HttpResponse())
+        with mock.patch('time.time', return_value=1015):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            storage.current_step = 'step3'
+            storage.update_response(HttpResponse())
+        with mock.patch('time.time', return_value=1022):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            self.assertEqual(storage.current_step, 'step3')
+            self.assertEqual(storage.get_step_data('start'), {'field1': ['data1']})
+            self.assertEqual(storage.get_step_data('step2'), {'field1': ['data2']})
+        with mock.patch('time.time', return_value=1026):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            self.assertIsNone(storage.current_step)
+
+    def test_cache_calls_per_write(self):
+        class ShortLivedCacheStorage(CacheStorage):
+            timeout = 10
+
+        request = get_request()
+        steps = ['step%d' % i for i in range(5)]
+        with mock.patch('time.time', return_value=1000):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            for step in steps:
+                storage.set_step_data(step, {'field1': [step]})
+            response = HttpResponse()
+            storage.update_response(response)
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+
+        def write(now, step):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            backend = storage.cache
+            with mock.patch('time.time', return_value=now), \
+                    mock.patch.object(backend, 'set_many', wraps=backend.set_many) as set_many, \
+                    mock.patch.object(backend, 'touch', wraps=backend.touch) as touch:
+                storage.set_step_data(step, {'field1': [str(now)]})
+                storage.update_response(HttpResponse())
+            return set_many.call_count, touch.call_count
+
+        # Writing a step doesn't touch the keys of the other steps...
+        self.assertEqual(write(1004, 'step4'), (1, 0))
+        # ...until half of the timeout has passed since they were refreshed.
+        self.assertEqual(write(1005, 'step4'), (1, 4))
+        self.assertEqual(write(1009, 'step0'), (1, 0))
+        with mock.patch('time.time', return_value=1014):
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            self.assertEqual(storage.get_step_data('step1'), {'field1': ['step1']})
+
+    def test_manipulated_token(self):
+        request = get_request()
+        request.COOKIES['wizard_wizard1'] = 'i_am_manipulated'
+        storage = self.get_storage()('wizard1', request, None)
+        self.assertNotEqual(storage.token, 'i_am_manipulated')
+        self.assertIsNone(storage.current_step)
+        response = HttpResponse()
+        storage.update_response(response)
+        self.assertIn(storage.prefix, response.cookies)
+
+    def test_cache_alias_and_timeout(self):
+        class ShortLivedCacheStorage(CacheStorage):
+            cache_alias = 'wizard'
+            timeout = 0
+
+        with self.settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'wizard': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'wizard'},
+        }):
+            request = get_request()
+            storage = ShortLivedCacheStorage('wizard1', request, None)
+            storage.current_step = 'start'
+            storage.update_response(HttpResponse())
+            self.assertIsNone(storage.cache.get(storage.get_cache_key()))
@@ -1,4 +1,7 @@
+import datetime
+
 from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
 from django.http import HttpResponse
 from django.test import TestCase
 
@@ -48,3 +51,87 @@ class TestCookieStorage(TestStorage, TestCase):
             request.get_signed_cookie(storage.prefix),
             {"step_files": {}, "step": None, "extra_data": {}, "step_data": {}}
         )
+
+    def get_response_storage(self, request, data):
+        storage = self.get_storage()('wizard1', request, None)
+        storage.data = data
+        response = HttpResponse()
+        storage.update_response(response)
+        for name, cookie in response.cookies.items():
+            request.COOKIES[name] = cookie.value
+        return response, storage
+
+    def test_compressed_cookie(self):
+        request = get_request()
+        data = {'step_data': {'form%d' % i: {'field': ['value'] * 10} for i in range(10)}}
+        response, storage = self.get_response_storage(request, data)
+        value = request.get_signed_cookie(storage.prefix)
+        self.assertTrue(value.startswith('.'))
+        self.assertLess(len(value), len(storage.serializer.dumps(data)))
+        self.assertEqual(self.get_storage()('wizard1', request, None).data, data)
+
+    def test_uncompressed_cookie(self):
+        class UncompressedCookieStorage(CookieStorage):
+            compress = False
+
+        request = get_request()
+        data = {'step_data': {'form%d' % i: {'field': ['value'] * 10} for i in range(10)}}
+        storage = UncompressedCookieStorage('wizard1', request, None)
+        storage.data = data
+        response = HttpResponse()
+        storage.update_response(response)
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+        self.assertEqual(request.get_signed_cookie(storage.prefix), storage.serializer.dumps(data).decode())
+        self.assertEqual(UncompressedCookieStorage('wizard1', request, None).data, data)
+
+    def test_chunked_cookie(self):
+        request = get_request()
+        data = {'step_data': {'form%d' % i: {'field': [str(i * 1000 + j) for j in range(200)]}
+                              for i in range(10)}}
+        response, storage = self.get_response_storage(request, data)
+        count = int(response.cookies[storage.prefix].value)
+        self.assertGreater(count, 1)
+        chunk_names = storage.get_chunk_names(count)
+        self.assertEqual(chunk_names[0], 'wizard_wizard1-1')
+        for name in chunk_names:
+            self.assertLessEqual(len(response.cookies[name].value), storage.max_cookie_size)
+        self.assertEqual(self.get_storage()('wizard1', request, None).data, data)
+
+        # Missing or manipulated chunks invalidate the data.
+        chunk = request.COOKIES.pop('wizard_wizard1-2')
+        self.assertIsNone(storage.load_data())
+        request.COOKIES['wizard_wizard1-2'] = chunk[1:]
+        self.assertIsNone(storage.load_data())
+        request.COOKIES['wizard_wizard1-2'] = chunk
+
+        # Obsolete chunks are deleted when the data shrinks.
+        response, storage = self.get_response_storage(request, {'key1': 'value1'})
+        self.assertEqual(request.get_signed_cookie(storage.prefix), '{"key1":"value1"}')
+        for name in chunk_names:
+            self.assertEqual(response.cookies[name]['max-age'], 0)
+
+    def test_unchanged_cookie_not_sent(self):
+        request = get_request()
+        self.get_response_storage(request, {'key1': 'value1'})
+        storage = self.get_storage()('wizard1', request, None)
+        self.assertEqual(storage.data, {'key1': 'value1'})
+        response = HttpResponse()
+        storage.update_response(response)
+        self.assertEqual(len(response.cookies), 0)
+
+        storage.data['key1'] = 'value2'
+        storage.update_response(response)
+        self.assertIn(storage.prefix, response.cookies)
+
+    def test_deprecated_encoder(self):
+        class EncoderCookieStorage(CookieStorage):
+            encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+        request = get_request()
+        with self.assertWarnsMessage(DeprecationWarning, 'CookieStorage.encoder is deprecated'):
+            storage = EncoderCookieStorage('wizard1', request, None)
+        storage.data = {'key1': datetime.date(2006, 10, 25)}
+        response = HttpResponse()
+        storage.update_response(response)
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+        self.assertEqual(request.get_signed_cookie(storage.prefix), '{"key1":"2006-10-25"}')
@@ -1,7 +1,9 @@
 import sys
 from collections import OrderedDict
 from importlib import import_module
+from unittest import mock
 
+from asgiref.sync import async_to_sync
 from django import forms, http
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -9,8 +11,12 @@ from django.db import models
 from django.template.response import TemplateResponse
 from django.test import TestCase
 
+from formtools.wizard.storage import NoFileStorageConfigured
+from formtools.wizard.timing import LoggingWizardTimer
 from formtools.wizard.views import (
-    CookieWizardView, SessionWizardView, WizardView,
+    AsyncSessionWizardView, CookieWizardView, CountingDict,
+    CountingOrderedDict, InstanceLookup, SessionWizardView, StepIndex,
+    WizardView, analyze_form_list, get_instance_kwarg,
 )
 
 
@@ -43,6 +49,10 @@ class Step3(forms.Form):
     data = forms.CharField()
 
 
+class FileStep(forms.Form):
+    file = forms.FileField()
+
+
 class CustomKwargsStep1(Step1):
 
     def __init__(self, test=None, *args, **kwargs):
@@ -54,7 +64,7 @@ class TestModel(models.Model):
     name = models.CharField(max_length=100)
 
     class Meta:
-        app_label = 'formtools'
+        app_label = 'wizardtests'
 
 
 class TestModelForm(forms.ModelForm):
@@ -101,6 +111,13 @@ class TestWizardWithCustomGetFormList(TestWizard):
         return {'start': Step1, 'step2': Step2}
 
 
+class TestAsyncWizard(AsyncSessionWizardView):
+
+    async def dispatch(self, request, *args, **kwargs):
+        response = await super().dispatch(request, *args, **kwargs)
+        return response, self
+
+
 class FormTests(TestCase):
     def test_form_init(self):
         testform = TestWizard.get_initkwargs([Step1, Step2])
@@ -115,6 +132,37 @@ class FormTests(TestCase):
         testform = TestWizardWithInitAttrs.get_initkwargs()
         self.assertEqual(testform['form_list'], {'0': Step1, '1': Step2})
 
+    def test_form_init_cached(self):
+        form_list = [('start', Step1), ['step2', Step2], Step3]
+        analyze_form_list.cache_clear()
+        testform = TestWizard.get_initkwargs(form_list)
+        self.assertEqual(testform['form_list'], {'start': Step1, 'step2': Step2, '2': Step3})
+        testform2 = TestWizard.get_initkwargs(form_list)
+        self.assertEqual(testform2['form_list'], testform['form_list'])
+        # Each view gets its own form list.
+        self.assertIsNot(testform2['form_list'], testform['form_list'])
+        info = analyze_form_list.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_form_init_file_storage(self):
+        form_list = [('start', Step1), ('files', FileStep)]
+        self.assertTrue(analyze_form_list(tuple(form_list))[1])
+        self.assertFalse(analyze_form_list((Step1, Step2))[1])
+        with self.assertRaises(NoFileStorageConfigured):
+            TestWizard.get_initkwargs(form_list)
+
+        class FileStorageWizard(TestWizard):
+            file_storage = object()
+
+        testform = FileStorageWizard.get_initkwargs(form_list)
+        self.assertEqual(testform['form_list'], {'start': Step1, 'files': FileStep})
+
+    def test_instance_kwarg(self):
+        self.assertEqual(get_instance_kwarg(TestModelForm), 'instance')
+        self.assertEqual(get_instance_kwarg(TestModelFormSet), 'queryset')
+        self.assertIsNone(get_instance_kwarg(Step1))
+        self.assertIsNone(get_instance_kwarg(forms.formset_factory(Step1)))
+
     def test_first_step(self):
         request = get_request()
         testform = TestWizard.as_view([Step1, Step2])
@@ -236,7 +284,211 @@ class FormTests(TestCase):
         cleaned_data_2 = instance.get_cleaned_data_for_step('start')
         self.assertEqual(TrackedStep1.instantiation_count, 1)
         self.assertEqual(cleaned_data_1, cleaned_data_2)
-        self.assertTrue(hasattr(instance, '_cleaned_data_cache_start'))
+        self.assertIn('start', instance._validated_forms)
+
+    def test_validated_form_caching(self):
+        class TrackedStep1(Step1):
+            validation_count = 0
+
+            def full_clean(self):
+                TrackedStep1.validation_count += 1
+                super().full_clean()
+
+        class TrackedWizard(TestWizard):
+            def done(self, form_list, **kwargs):
+                self.all_cleaned_data = self.get_all_cleaned_data()
+                return http.HttpResponse()
+
+        testform = TrackedWizard.as_view([('start', TrackedStep1), ('step2', TrackedStep1)])
+        request = get_request({'tracked_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = testform(request)
+        instance.storage.set_step_data('step2', {'step2-name': ['test2']})
+        TrackedStep1.validation_count = 0
+        instance.render_done(None)
+        # Each step is only validated once, although done() revalidates all steps.
+        self.assertEqual(TrackedStep1.validation_count, 2)
+        self.assertEqual(instance.all_cleaned_data, {'name': 'test2'})
+
+        # Invalid data is cached too, until the stored data changes.
+        TrackedStep1.validation_count = 0
+        instance.storage.set_step_data('start', {'start-name': ['']})
+        self.assertIsNone(instance.get_cleaned_data_for_step('start'))
+        self.assertIsNone(instance.get_cleaned_data_for_step('start'))
+        self.assertEqual(TrackedStep1.validation_count, 1)
+        instance.storage.set_step_data('start', {'start-name': ['changed']})
+        self.assertEqual(instance.get_cleaned_data_for_step('start'), {'name': 'changed'})
+        self.assertEqual(TrackedStep1.validation_count, 2)
+
+    def test_trust_validated_steps(self):
+        class TrustingWizard(TestWizard):
+            trust_validated_steps = True
+            condition_dict = {'start': lambda wizard: wizard.include_start}
+            include_start = True
+
+        testform = TrustingWizard.as_view([('start', Step1), ('step2', Step2), ('step3', Step3)])
+        request = get_request({'trusting_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = testform(request)
+        self.assertEqual(instance.steps.current, 'step2')
+        self.assertTrue(instance.is_step_validated('start'))
+        self.assertIs(instance.get_validated_form('start').wizard_validated, True)
+
+        # The digest is stored along with the wizard data.
+        request = get_request({'trusting_wizard-current_step': 'step2', 'step2-name': 'test2'})
+        request.session = instance.request.session
+        response, instance = testform(request)
+        self.assertEqual(instance.steps.current, 'step3')
+        self.assertTrue(instance.is_step_validated('start'))
+        self.assertTrue(instance.is_step_validated('step2'))
+        self.assertFalse(instance.is_step_validated('step3'))
+
+        # Changing the steps leading to a step invalidates its digest.
+        instance.include_start = False
+        del instance._resolved_form_list
+        self.assertFalse(instance.is_step_validated('step2'))
+        instance.include_start = True
+        del instance._resolved_form_list
+        self.assertTrue(instance.is_step_validated('step2'))
+
+        # So does changing its data.
+        instance.storage.set_step_data('start', {'start-name': ['changed']})
+        self.assertFalse(instance.is_step_validated('start'))
+        self.assertIs(instance.get_validated_form('start').wizard_validated, False)
+
+        instance.always_revalidate_steps = ['step2']
+        self.assertFalse(instance.is_step_validated('step2'))
+
+    def test_untrusted_validated_steps(self):
+        testform = TestWizard.as_view([('start', Step1), ('step2', Step2)])
+        request = get_request({'test_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = testform(request)
+        self.assertIsNone(instance.storage.get_validation_digest('start'))
+        self.assertFalse(instance.is_step_validated('start'))
+        self.assertIs(instance.get_validated_form('start').wizard_validated, False)
+
+    def test_cached_conditions(self):
+        calls = []
+
+        def has_name(wizard):
+            calls.append('step2')
+            return (wizard.get_cleaned_data_for_step('start') or {}).get('name') == 'test'
+
+        def always(wizard):
+            calls.append('step3')
+            return True
+
+        class CachingWizard(TestWizard):
+            cache_conditions = True
+            step_dependencies = {'step2': ['start']}
+            condition_dict = {'step2': has_name, 'step3': always}
+
+        testform = CachingWizard.as_view([('start', Step1), ('step2', Step2), ('step3', Step3)])
+        request = get_request({'caching_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = testform(request)
+        self.assertEqual(instance.steps.current, 'step2')
+        self.assertEqual(calls.count('step2'), 2)
+
+        # The result is reused as long as the data of 'start' doesn't change,
+        # the other conditions are evaluated once per request.
+        calls.clear()
+        request = get_request({'caching_wizard-current_step': 'step2', 'step2-name': 'test2'})
+        request.session = instance.request.session
+        response, instance = testform(request)
+        self.assertEqual(instance.steps.current, 'step3')
+        self.assertEqual(calls, ['step3'])
+
+        # Submitting 'start' again invalidates it.
+        calls.clear()
+        request = get_request({'caching_wizard-current_step': 'start', 'start-name': 'other'})
+        request.session = instance.request.session
+        response, instance = testform(request)
+        self.assertEqual(calls.count('step2'), 1)
+        self.assertEqual(instance.steps.all, ['start', 'step3'])
+
+        # Nothing is cached unless enabled.
+        instance.cache_conditions = False
+        self.assertIsNone(instance.get_condition_digest('step2'))
+
+    def test_step_dependencies(self):
+        calls = []
+
+        def has_name(wizard):
+            calls.append('step2')
+            return (wizard.get_cleaned_data_for_step('start') or {}).get('name') == 'test'
+
+        def always(wizard):
+            calls.append('step4')
+            return True
+
+        class DependentWizard(TestWizard):
+            step_dependencies = {'step2': ['start'], 'step3': ['step2']}
+            condition_dict = {'step2': has_name, 'step4': always}
+
+            def get_form_initial(self, step):
+                if step == 'step3':
+                    return {'data': (self.get_cleaned_data_for_step('step2') or {}).get('name')}
+                return super().get_form_initial(step)
+
+        testform = DependentWizard.as_view([('start', Step1), ('step2', Step2), ('step3', Step3), ('step4', Step1)])
+        request = get_request({'dependent_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = testform(request)
+        self.assertEqual(instance.get_step_dependencies('step3'), {'start', 'step2'})
+        self.assertEqual(instance.get_affected_steps('start'), {'step2', 'step3'})
+        self.assertEqual(instance.get_affected_steps('step4'), set())
+
+        for step, name in [('step2', 'name'), ('step3', 'data'), ('step4', 'name')]:
+            instance.storage.set_step_data(step, {f'{step}-{name}': ['test']})
+        for step in instance.steps.all:
+            instance.get_validated_form(step)
+        form_list = instance._resolved_form_list
+        calls.clear()
+
+        # Only the forms depending on the changed step are dropped, the
+        # conditions are kept since none of them depends on it.
+        instance._clear_caches('step2')
+        self.assertEqual(sorted(instance._validated_forms), ['start', 'step4'])
+        self.assertIs(instance._resolved_form_list, form_list)
+
+        # Only the affected conditions are evaluated again.
+        instance._clear_caches('start')
+        self.assertEqual(sorted(instance._validated_forms), ['step4'])
+        self.assertEqual(instance.steps.all, ['start', 'step2', 'step3', 'step4'])
+        self.assertEqual(calls, ['step2'])
+
+        # Without dependencies, everything is cleared.
+        instance.step_dependencies = None
+        calls.clear()
+        instance._clear_caches('step4')
+        self.assertEqual(instance._validated_forms, {})
+        self.assertEqual(instance.steps.all, ['start', 'step2', 'step3', 'step4'])
+        self.assertEqual(calls, ['step2', 'step4'])
+
+    def test_timer(self):
+        class TimedWizard(TestWizard):
+            timer_class = LoggingWizardTimer
+            condition_dict = {'step2': lambda wizard: True}
+
+        testform = TimedWizard.as_view([('start', Step1), ('step2', Step2)])
+        request = get_request({'timed_wizard-current_step': 'start', 'start-name': 'test'})
+        with self.assertLogs('formtools.wizard.timing', 'INFO') as logs:
+            response, instance = testform(request)
+            # The timer finishes once the template response is rendered.
+            self.assertIsNone(instance.timer.duration)
+            response.render()
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0]
+        self.assertEqual(record.wizard, 'TimedWizard')
+        self.assertEqual(record.duration, instance.timer.duration)
+        self.assertEqual(
+            list(record.phases),
+            ['storage', 'conditions', 'get_form', 'validation', 'set_step_data',
+             'set_step_files', 'render', 'update_response'],
+        )
+        self.assertEqual(record.phases['get_form']['count'], 2)
+        self.assertTrue(record.getMessage().startswith('TimedWizard POST '))
+
+        # Without a timer class, no timer is used.
+        response, instance = TestWizard.as_view([('start', Step1)])(get_request())
+        self.assertIsNone(instance.timer)
 
     def test_form_list_mutation_regression(self):
         class PlaceholderForm(forms.Form):
@@ -269,6 +521,51 @@ class FormTests(TestCase):
         self.assertEqual(instance.get_step_index('step2'), None)
         self.assertEqual(instance.get_next_step('step2'), 'start')
 
+    def test_resolved_steps_shared(self):
+        request = get_request()
+        testform = TestWizard.as_view([('start', Step1), ('step2', Step2), ('step3', Step3)])
+        response, instance = testform(request)
+        steps = instance.get_resolved_steps()
+        self.assertIsInstance(steps, StepIndex)
+        self.assertIs(instance.get_resolved_steps(), steps)
+        self.assertEqual(steps.steps, ('start', 'step2', 'step3'))
+        self.assertEqual(instance.steps.all, ['start', 'step2', 'step3'])
+        self.assertEqual(instance.steps.count, 3)
+        self.assertEqual(instance.steps.last, 'step3')
+        self.assertEqual(instance.get_prev_step('step2'), 'start')
+        self.assertIsNone(instance.get_prev_step('start'))
+        self.assertIsNone(instance.get_next_step('step3'))
+        self.assertIsNone(instance.get_prev_step('unknown'))
+        # Changing the conditions rebuilds the index.
+        instance.condition_dict['step2'] = False
+        self.assertIsNot(instance.get_resolved_steps(), steps)
+        self.assertEqual(instance.steps.all, ['start', 'step3'])
+        self.assertEqual(instance.get_next_step('start'), 'step3')
+
+    def test_resolved_steps_signature(self):
+        testform = TestWizard.as_view([('start', Step1), ('step2', Step2)], condition_dict={'step2': True})
+        response, instance = testform(get_request())
+        self.assertIsInstance(instance.form_list, CountingOrderedDict)
+        self.assertIsInstance(instance.condition_dict, CountingDict)
+        steps = instance.get_resolved_steps()
+        # Looking up steps doesn't go through the form list and conditions.
+        with mock.patch.object(CountingOrderedDict, 'items', side_effect=AssertionError), \
+                mock.patch.object(CountingDict, 'items', side_effect=AssertionError):
+            self.assertIs(instance.get_resolved_steps(), steps)
+            self.assertEqual(instance.get_step_index('step2'), 1)
+        instance.condition_dict.update({'step2': False})
+        self.assertEqual(instance.steps.all, ['start'])
+        instance.form_list.move_to_end('start')
+        instance.condition_dict.pop('step2')
+        self.assertEqual(instance.steps.all, ['step2', 'start'])
+
+    def test_resolved_steps_custom_get_form_list(self):
+        request = get_request()
+        testform = TestWizardWithCustomGetFormList.as_view([('start', Step1)])
+        response, instance = testform(request)
+        self.assertEqual(instance.steps.all, ['start', 'step2'])
+        self.assertEqual(instance.get_next_step('start'), 'step2')
+
     def test_form_kwargs(self):
         request = get_request()
         testform = TestWizard.as_view([
@@ -336,6 +633,35 @@ class FormTests(TestCase):
         self.assertEqual(instance.get_form_instance('non_exist_instance'), None)
         self.assertEqual(instance.get_form().initial_form_count(), 1)
 
+    def test_form_instances(self):
+        obj1 = TestModel.objects.create(name='test object 1')
+        obj2 = TestModel.objects.create(name='test object 2')
+
+        class InstancesWizard(TestWizard):
+            def get_form_instances(self):
+                return {
+                    'start': InstanceLookup(TestModel, str(obj1.pk)),
+                    'step2': InstanceLookup(TestModel, obj2.pk),
+                    'step3': InstanceLookup(TestModel, 0),
+                    'step4': TestModel.objects.all(),
+                }
+
+        testform = InstancesWizard.as_view([
+            ('start', TestModelForm), ('step2', TestModelForm), ('step3', TestModelForm),
+            ('step4', TestModelFormSet),
+        ])
+        # Rendering the first step loads the lookups in one query and the
+        # queryset in another.
+        with self.assertNumQueries(2):
+            response, instance = testform(get_request())
+        with self.assertNumQueries(0):
+            self.assertEqual(instance.get_form_instance('start'), obj1)
+            self.assertEqual(instance.get_form('step2').instance, obj2)
+            self.assertIsNone(instance.get_form_instance('step3'))
+            forms = [instance.get_form('step4'), instance.get_form('step4')]
+            self.assertEqual([form.initial_form_count() for form in forms], [2, 2])
+            self.assertEqual(list(forms[0].get_queryset()), [obj1, obj2])
+
     def test_done(self):
         request = get_request()
         testform = TestWizard.as_view([('start', Step1), ('step2', Step2)])
@@ -383,6 +709,147 @@ class FormTests(TestCase):
         self.assertIsInstance(instance.get_form('step2'), Step2)
 
 
+class AsyncFormTests(TestCase):
+
+    def test_async_condition(self):
+        async def has_name(wizard):
+            cleaned_data = await wizard.aget_cleaned_data_for_step('start') or {}
+            return cleaned_data.get('name') == 'test'
+
+        testform = TestAsyncWizard.as_view(
+            [('start', Step1), ('step2', Step2), ('step3', Step3)],
+            condition_dict={'step2': has_name},
+        )
+        response, instance = async_to_sync(testform)(get_request())
+        self.assertEqual(instance.steps.all, ['start', 'step3'])
+
+        request = get_request({'test_async_wizard-current_step': 'start', 'start-name': 'test'})
+        request.session = instance.request.session
+        response, instance = async_to_sync(testform)(request)
+        self.assertEqual(instance.steps.current, 'step2')
+        self.assertEqual(instance.steps.all, ['start', 'step2', 'step3'])
+
+    def test_async_cached_condition(self):
+        calls = []
+
+        async def has_name(wizard):
+            calls.append('step2')
+            cleaned_data = await wizard.aget_cleaned_data_for_step('start') or {}
+            return cleaned_data.get('name') == 'test'
+
+        class CachingAsyncWizard(TestAsyncWizard):
+            cache_conditions = True
+            step_dependencies = {'step2': ['start']}
+
+        testform = CachingAsyncWizard.as_view(
+            [('start', Step1), ('step2', Step2), ('step3', Step3)],
+            condition_dict={'step2': has_name},
+        )
+        request = get_request({'caching_async_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = async_to_sync(testform)(request)
+        self.assertEqual(instance.steps.current, 'step2')
+
+        calls.clear()
+        request = get_request({'caching_async_wizard-current_step': 'step2', 'step2-name': 'test2'})
+        request.session = instance.request.session
+        response, instance = async_to_sync(testform)(request)
+        self.assertEqual(instance.steps.current, 'step3')
+        self.assertEqual(calls, [])
+
+    def test_async_form_instances(self):
+        obj = TestModel.objects.create(name='test object')
+
+        class InstancesAsyncWizard(TestAsyncWizard):
+            def get_form_instances(self):
+                return {'start': InstanceLookup(TestModel.objects.all(), obj.pk)}
+
+        testform = InstancesAsyncWizard.as_view([('start', TestModelForm), ('step2', Step2)])
+        # The instances are loaded in a thread, not in the event loop.
+        response, instance = async_to_sync(testform)(get_request())
+        self.assertEqual(response.context_data['form'].instance, obj)
+
+    def test_async_sync_condition(self):
+        def has_users(wizard):
+            return User.objects.exists()
+
+        testform = TestAsyncWizard.as_view(
+            [('start', Step1), ('step2', Step2), ('step3', Step3)],
+            condition_dict={'step2': has_users},
+        )
+        # Sync conditions are called in a thread, they may use the ORM.
+        response, instance = async_to_sync(testform)(get_request())
+        self.assertEqual(instance.steps.all, ['start', 'step3'])
+
+    def test_async_sync_done(self):
+        class SyncDoneWizard(TestAsyncWizard):
+            def done(self, form_list, **kwargs):
+                return http.HttpResponse(str(User.objects.count()))
+
+        testform = SyncDoneWizard.as_view([('start', Step1)])
+        request = get_request({'sync_done_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = async_to_sync(testform)(request)
+        self.assertEqual(response.content, b'0')
+
+    def test_async_orm_hooks(self):
+        class OrmHooksWizard(TestAsyncWizard):
+            def get_form_initial(self, step):
+                return {'name': str(User.objects.count())}
+
+            def get_context_data(self, form, **kwargs):
+                context = super().get_context_data(form=form, **kwargs)
+                context['user_exists'] = User.objects.exists()
+                return context
+
+        testform = OrmHooksWizard.as_view([('start', Step1), ('step2', Step2)])
+        # The forms and the context are built in a thread, the hooks may use the ORM.
+        response, instance = async_to_sync(testform)(get_request())
+        self.assertEqual(response.context_data['form'].initial, {'name': '0'})
+        self.assertIs(response.context_data['user_exists'], False)
+
+        request = get_request({'orm_hooks_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = async_to_sync(testform)(request)
+        self.assertEqual(instance.steps.current, 'step2')
+        self.assertEqual(response.context_data['form'].initial, {'name': '0'})
+
+    def test_async_done(self):
+        class DoneWizard(TestAsyncWizard):
+            async def done(self, form_list, **kwargs):
+                return http.HttpResponse(str(await self.aget_all_cleaned_data()))
+
+        testform = DoneWizard.as_view([('start', Step1)])
+        request = get_request({'done_wizard-current_step': 'start', 'start-name': 'test'})
+        response, instance = async_to_sync(testform)(request)
+        self.assertEqual(response.content, b"{'name': 'test'}")
+        self.assertIsNone(instance.storage.current_step)
+
+    def test_async_revalidation_failure(self):
+        testform = TestAsyncWizard.as_view([('start', Step1), ('step2', Step2)])
+        response, instance = async_to_sync(testform)(get_request())
+        instance.storage.current_step = 'step2'
+        response = async_to_sync(instance.render_done)(None)
+        self.assertEqual(instance.storage.current_step, 'start')
+        self.assertEqual(response.context_data['wizard']['form'].prefix, 'start')
+
+
+class StepIndexTests(TestCase):
+    def test_lookups(self):
+        steps = StepIndex(['start', 'step2', 'step3'])
+        self.assertEqual(len(steps), 3)
+        self.assertEqual(list(steps), ['start', 'step2', 'step3'])
+        self.assertIn('step2', steps)
+        self.assertNotIn('step4', steps)
+        self.assertEqual(steps.first, 'start')
+        self.assertEqual(steps.last, 'step3')
+        self.assertEqual(steps.index('step3'), 2)
+        self.assertIsNone(steps.index('step4'))
+        self.assertEqual(steps.next('start'), 'step2')
+        self.assertIsNone(steps.next('step3'))
+        self.assertIsNone(steps.next('step4'))
+        self.assertEqual(steps.prev('step3'), 'step2')
+        self.assertIsNone(steps.prev('start'))
+        self.assertIsNone(steps.prev('step4'))
+
+
 class SessionFormTests(TestCase):
     def test_init(self):
         request = get_request()
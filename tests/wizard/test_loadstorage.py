@@ -1,16 +1,33 @@
 from django.test import TestCase
 
-from formtools.wizard.storage import MissingStorage, get_storage
+from formtools.wizard.storage import (
+    MissingStorage, get_storage, get_storage_class,
+)
 from formtools.wizard.storage.base import BaseStorage
 
 
 class TestLoadStorage(TestCase):
+    def setUp(self):
+        get_storage_class.cache_clear()
+
     def test_load_storage(self):
         self.assertIsInstance(
             get_storage('formtools.wizard.storage.base.BaseStorage', 'wizard1'),
             BaseStorage
         )
 
+    def test_load_storage_class(self):
+        self.assertIsInstance(get_storage(BaseStorage, 'wizard1'), BaseStorage)
+
+    def test_storage_class_cache(self):
+        path = 'formtools.wizard.storage.base.BaseStorage'
+        self.assertIs(get_storage_class(path), BaseStorage)
+        self.assertIs(get_storage_class(path), BaseStorage)
+        info = get_storage_class.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        get_storage_class.cache_clear()
+        self.assertEqual(get_storage_class.cache_info().currsize, 0)
+
     def test_missing_storage(self):
         with self.assertRaises(MissingStorage):
             get_storage('formtools.wizard.storage.idontexist.IDontExistStorage', 'wizard1')
@@ -0,0 +1,126 @@
+import unittest
+
+from django import forms
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from formtools.wizard.storage.cache import CacheStorage
+from formtools.wizard.storage.cookie import CookieStorage
+from formtools.wizard.storage.serializers import (
+    CompactJSONSerializer, JSONSerializer, MsgPackSerializer, msgpack,
+)
+from formtools.wizard.views import CookieWizardView
+
+from .storage import get_request
+
+WIZARD_DATA = {
+    'step': 'form2',
+    'step_data': {
+        'form1': {'form1-name': ['Pony'], 'form1-thirsty': ['2']},
+        'form2': {
+            'form2-TOTAL_FORMS': ['2'],
+            'form2-0-name': ['first'],
+            'form2-1-name': ['second'],
+        },
+    },
+    'step_files': {
+        'form1': {'file': {'tmp_name': 'a.txt', 'name': 'a.txt', 'size': 1}},
+        'form2': {'file': {'tmp_name': 'b.txt', 'name': 'b.txt', 'size': 2}},
+    },
+    'extra_data': {},
+}
+
+
+class SerializerTests(unittest.TestCase):
+    def test_json(self):
+        serializer = JSONSerializer()
+        data = serializer.dumps(WIZARD_DATA)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(serializer.loads(data), WIZARD_DATA)
+
+    def test_compact_json(self):
+        serializer = CompactJSONSerializer()
+        data = serializer.dumps(WIZARD_DATA)
+        self.assertEqual(serializer.loads(data), WIZARD_DATA)
+        # Repeated keys are only stored once.
+        self.assertEqual(data.count(b'"tmp_name"'), 1)
+        step_files = {
+            'form%d' % i: {'file': {'tmp_name': 'a.txt', 'name': 'a.txt', 'content_type': 'text/plain'}}
+            for i in range(10)
+        }
+        data = serializer.dumps(step_files)
+        self.assertEqual(serializer.loads(data), step_files)
+        self.assertLess(len(data), len(JSONSerializer().dumps(step_files)))
+
+    def test_compact_json_numeric_keys(self):
+        serializer = CompactJSONSerializer()
+        data = {
+            'step_data': {'0': {'a': 1}, '1': {'a': 2}, '~x': {'a': 3}},
+            'step_files': {'0': {}, '1': {}},
+        }
+        self.assertEqual(serializer.loads(serializer.dumps(data)), data)
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack(self):
+        serializer = MsgPackSerializer()
+        self.assertEqual(serializer.loads(serializer.dumps(WIZARD_DATA)), WIZARD_DATA)
+
+    @unittest.skipIf(msgpack is not None, 'msgpack is installed')
+    def test_msgpack_missing(self):
+        with self.assertRaises(ImproperlyConfigured):
+            MsgPackSerializer()
+
+
+class StorageSerializerTests(TestCase):
+    def roundtrip(self, storage_class, serializer):
+        request = get_request()
+        storage = storage_class('wizard1', request, None, serializer=serializer)
+        self.assertIsInstance(storage.serializer, serializer)
+        storage.data.update(WIZARD_DATA)
+        storage.mark_modified()
+        response = HttpResponse()
+        storage.update_response(response)
+        for name, cookie in response.cookies.items():
+            request.COOKIES[name] = cookie.value
+        storage = storage_class('wizard1', request, None, serializer=serializer)
+        self.assertEqual(storage.current_step, 'form2')
+        self.assertEqual(storage.get_step_data('form1'), WIZARD_DATA['step_data']['form1'])
+        self.assertEqual(storage.get_step_data('form2'), WIZARD_DATA['step_data']['form2'])
+
+    def test_cookie_storage(self):
+        self.assertIsInstance(CookieStorage('wizard1', get_request()).serializer, JSONSerializer)
+        self.roundtrip(CookieStorage, CompactJSONSerializer)
+
+    def test_cache_storage(self):
+        self.assertIsNone(CacheStorage('wizard1', get_request()).serializer)
+
+        request = get_request()
+        storage = CacheStorage('wizard1', request, None, serializer=CompactJSONSerializer)
+        storage.current_step = 'form2'
+        for step, step_data in WIZARD_DATA['step_data'].items():
+            storage.set_step_data(step, step_data)
+        response = HttpResponse()
+        storage.update_response(response)
+        self.assertIsInstance(storage.cache.get(storage.get_cache_key('form1')), bytes)
+        request.COOKIES[storage.prefix] = response.cookies[storage.prefix].value
+        storage = CacheStorage('wizard1', request, None, serializer=CompactJSONSerializer)
+        self.assertEqual(storage.current_step, 'form2')
+        self.assertEqual(storage.get_step_data('form2'), WIZARD_DATA['step_data']['form2'])
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_cookie_storage_msgpack(self):
+        self.roundtrip(CookieStorage, MsgPackSerializer)
+
+    def test_wizard_storage_serializer(self):
+        class CompactCookieWizardView(CookieWizardView):
+            storage_serializer = CompactJSONSerializer
+
+            def dispatch(self, request, *args, **kwargs):
+                response = super().dispatch(request, *args, **kwargs)
+                response.wizard = self
+                return response
+
+        view = CompactCookieWizardView.as_view([forms.Form])
+        response = view(RequestFactory().get('/'))
+        self.assertIsInstance(response.wizard.storage.serializer, CompactJSONSerializer)
@@ -2,9 +2,67 @@ from django.test import TestCase
 
 from formtools.wizard.storage.session import SessionStorage
 
-from .storage import TestStorage
+from .storage import TestStorage, get_request
 
 
 class TestSessionStorage(TestStorage, TestCase):
     def get_storage(self):
         return SessionStorage
+
+    def get_saved_storage(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, None)
+        storage.current_step = 'start'
+        storage.set_step_data('start', {'field1': ['data1']})
+        request.session.modified = False
+        return storage
+
+    def test_read_does_not_modify_session(self):
+        storage = self.get_saved_storage()
+        self.assertEqual(storage.current_step, 'start')
+        self.assertEqual(storage.get_step_data('start'), {'field1': ['data1']})
+        self.assertEqual(storage.extra_data, {})
+        self.assertIsNone(storage.get_step_files('start'))
+        self.assertFalse(storage.request.session.modified)
+
+    def test_unchanged_write_does_not_modify_session(self):
+        storage = self.get_saved_storage()
+        storage.current_step = 'start'
+        storage.set_step_data('start', {'field1': ['data1']})
+        self.assertFalse(storage.request.session.modified)
+
+        storage.set_step_files('start', None)
+        self.assertTrue(storage.request.session.modified)
+        storage.request.session.modified = False
+        storage.set_step_files('start', None)
+        self.assertFalse(storage.request.session.modified)
+
+    def test_reset_empty_wizard_does_not_modify_session(self):
+        request = get_request()
+        storage = self.get_storage()('wizard1', request, None)
+        request.session.modified = False
+        storage.reset()
+        self.assertFalse(request.session.modified)
+
+    def test_write_modifies_session(self):
+        for change in (
+            lambda storage: setattr(storage, 'current_step', 'step2'),
+            lambda storage: storage.set_step_data('start', {'field1': ['data2']}),
+            lambda storage: storage.set_step_data('step2', {'field1': ['data1']}),
+            lambda storage: setattr(storage, 'extra_data', {'key1': 'data1'}),
+            lambda storage: storage.reset(),
+            lambda storage: storage.mark_modified(),
+        ):
+            storage = self.get_saved_storage()
+            change(storage)
+            self.assertTrue(storage.request.session.modified)
+
+    def test_modified_on_access(self):
+        class AlwaysModifiedSessionStorage(SessionStorage):
+            modified_on_access = True
+
+        request = get_request()
+        storage = AlwaysModifiedSessionStorage('wizard1', request, None)
+        request.session.modified = False
+        storage.extra_data['key1'] = 'data1'
+        self.assertTrue(request.session.modified)
@@ -9,7 +9,7 @@ from django.forms.models import modelformset_factory
 from django.http import HttpResponse
 from django.template import Context, Template
 
-from formtools.wizard.views import WizardView
+from formtools.wizard.views import AsyncSessionWizardView, WizardView
 
 temp_storage_location = tempfile.mkdtemp(dir=os.environ.get('DJANGO_TEST_TEMP_DIR'))
 temp_storage = FileSystemStorage(location=temp_storage_location)
@@ -71,3 +71,22 @@ class SessionContactWizard(ContactWizard):
 
 class CookieContactWizard(ContactWizard):
     storage_name = 'formtools.wizard.storage.cookie.CookieStorage'
+
+
+class CacheContactWizard(ContactWizard):
+    storage_name = 'formtools.wizard.storage.cache.CacheStorage'
+
+
+class AsyncSessionContactWizard(AsyncSessionWizardView, ContactWizard):
+
+    async def done(self, form_list, **kwargs):
+        c = Context({
+            'form_list': [x.cleaned_data for x in form_list],
+            'all_cleaned_data': await self.aget_all_cleaned_data(),
+        })
+
+        for form in self.form_list:
+            c[form] = await self.aget_cleaned_data_for_step(form)
+
+        c['this_will_fail'] = await self.aget_cleaned_data_for_step('this_will_fail')
+        return HttpResponse(Template('').render(c))
@@ -5,7 +5,7 @@ class Poet(models.Model):
     name = models.CharField(max_length=100)
 
     class Meta:
-        app_label = 'formtools'
+        app_label = 'wizardtests'
 
     def __str__(self):
         return self.name
@@ -16,7 +16,7 @@ class Poem(models.Model):
     name = models.CharField(max_length=100)
 
     class Meta:
-        app_label = 'formtools'
+        app_label = 'wizardtests'
 
     def __str__(self):
         return self.name
@@ -41,6 +41,12 @@ class WizardTests:
         for file in temp_storage.listdir('')[1]:
             temp_storage.delete(file)
 
+    def get_tmp_file_name(self):
+        # The temporary file is named after a digest of its content.
+        tmp_names = temp_storage.listdir('')[1]
+        self.assertEqual(len(tmp_names), 1)
+        return tmp_names[0]
+
     def test_initial_call(self):
         response = self.client.get(self.wizard_url)
         wizard = response.context['wizard']
@@ -128,7 +134,7 @@ class WizardTests:
         self.assertEqual(response.context['wizard']['steps'].current, 'form3')
 
         # Check that the file got uploaded properly.
-        with open(__file__, 'rb') as f, temp_storage.open(UPLOADED_FILE_NAME) as f2:
+        with open(__file__, 'rb') as f, temp_storage.open(self.get_tmp_file_name()) as f2:
             self.assertEqual(f.read(), f2.read())
 
         response = self.client.post(self.wizard_url, self.wizard_step_data[2])
@@ -139,7 +145,7 @@ class WizardTests:
         self.assertEqual(response.status_code, 200)
 
         # After the wizard is done no files should exist anymore.
-        self.assertFalse(temp_storage.exists(UPLOADED_FILE_NAME))
+        self.assertEqual(temp_storage.listdir('')[1], [])
 
         all_data = response.context['form_list']
         del all_data[1]['file1']
@@ -162,7 +168,7 @@ class WizardTests:
             post_data['form2-file1'] = post_file
             response = self.client.post(self.wizard_url, post_data)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(temp_storage.exists(UPLOADED_FILE_NAME))
+        self.get_tmp_file_name()
 
         response = self.client.post(self.wizard_url, self.wizard_step_data[2])
         self.assertEqual(response.status_code, 200)
@@ -173,7 +179,7 @@ class WizardTests:
         all_data = response.context['all_cleaned_data']
         self.assertEqual(all_data['file1'].name, UPLOADED_FILE_NAME)
         self.assertTrue(all_data['file1'].closed)
-        self.assertFalse(temp_storage.exists(UPLOADED_FILE_NAME))
+        self.assertEqual(temp_storage.listdir('')[1], [])
         del all_data['file1']
         self.assertEqual(all_data, {
             'name': 'Pony', 'thirsty': True, 'user': self.testuser,
@@ -199,6 +205,7 @@ class WizardTests:
         self.assertEqual(response.status_code, 200)
         self.client.cookies.pop('sessionid', None)
         self.client.cookies.pop('wizard_cookie_contact_wizard', None)
+        self.client.cookies.pop('wizard_cache_contact_wizard', None)
 
         response = self.client.post(self.wizard_url, self.wizard_step_data[3])
         self.assertEqual(response.status_code, 200)
@@ -300,6 +307,70 @@ class CookieWizardTests(WizardTests, TestCase):
     )
 
 
+@override_settings(ROOT_URLCONF='tests.wizard.wizardtests.urls')
+class CacheWizardTests(WizardTests, TestCase):
+    wizard_url = '/wiz_cache/'
+    wizard_step_1_data = {
+        'cache_contact_wizard-current_step': 'form1',
+    }
+    wizard_step_data = (
+        {
+            'form1-name': 'Pony',
+            'form1-thirsty': '2',
+            'cache_contact_wizard-current_step': 'form1',
+        },
+        {
+            'form2-address1': '123 Main St',
+            'form2-address2': 'Djangoland',
+            'cache_contact_wizard-current_step': 'form2',
+        },
+        {
+            'form3-random_crap': 'blah blah',
+            'cache_contact_wizard-current_step': 'form3',
+        },
+        {
+            'form4-INITIAL_FORMS': '0',
+            'form4-TOTAL_FORMS': '2',
+            'form4-MAX_NUM_FORMS': '0',
+            'form4-0-random_crap': 'blah blah',
+            'form4-1-random_crap': 'blah blah',
+            'cache_contact_wizard-current_step': 'form4',
+        }
+    )
+
+
+@override_settings(ROOT_URLCONF='tests.wizard.wizardtests.urls')
+class AsyncSessionWizardTests(WizardTests, TestCase):
+    wizard_url = '/wiz_async_session/'
+    wizard_step_1_data = {
+        'async_session_contact_wizard-current_step': 'form1',
+    }
+    wizard_step_data = (
+        {
+            'form1-name': 'Pony',
+            'form1-thirsty': '2',
+            'async_session_contact_wizard-current_step': 'form1',
+        },
+        {
+            'form2-address1': '123 Main St',
+            'form2-address2': 'Djangoland',
+            'async_session_contact_wizard-current_step': 'form2',
+        },
+        {
+            'form3-random_crap': 'blah blah',
+            'async_session_contact_wizard-current_step': 'form3',
+        },
+        {
+            'form4-INITIAL_FORMS': '0',
+            'form4-TOTAL_FORMS': '2',
+            'form4-MAX_NUM_FORMS': '0',
+            'form4-0-random_crap': 'blah blah',
+            'form4-1-random_crap': 'blah blah',
+            'async_session_contact_wizard-current_step': 'form4',
+        }
+    )
+
+
 @override_settings(ROOT_URLCONF='tests.wizard.wizardtests.urls')
 class WizardTestKwargs(TestCase):
     wizard_url = '/wiz_other_template/'
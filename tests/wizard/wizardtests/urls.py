@@ -1,7 +1,8 @@
 from django.urls import path
 
 from .forms import (
-    CookieContactWizard, Page1, Page2, Page3, Page4, SessionContactWizard,
+    AsyncSessionContactWizard, CacheContactWizard, CookieContactWizard, Page1,
+    Page2, Page3, Page4, SessionContactWizard,
 )
 
 urlpatterns = [
@@ -15,6 +16,16 @@ urlpatterns = [
          ('form2', Page2),
          ('form3', Page3),
          ('form4', Page4)])),
+    path('wiz_cache/', CacheContactWizard.as_view(
+        [('form1', Page1),
+         ('form2', Page2),
+         ('form3', Page3),
+         ('form4', Page4)])),
+    path('wiz_async_session/', AsyncSessionContactWizard.as_view(
+        [('form1', Page1),
+         ('form2', Page2),
+         ('form3', Page3),
+         ('form4', Page4)])),
     path('wiz_other_template/', CookieContactWizard.as_view(
         [('form1', Page1),
          ('form2', Page2),